@@ -0,0 +1,183 @@
+"""
+Admission control for upstream generations.
+
+At most ADMISSION_MAX_CONCURRENCY generations run at once; further requests
+wait in a bounded queue with one lane per traffic class. Customize-plan
+requests (use_groq=True) are served before regular chatbot requests. Before a
+request is queued its wait is estimated from the queue ahead of it and the
+average generation time; when that exceeds the lane's deadline, or the queue
+is full, the request is shed straight away with a Retry-After hint instead of
+waiting until the client times out. Requests that are queued but not served
+within their deadline are shed as well.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Dict
+
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "16"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+# Longest a request may wait for a slot, per lane, in seconds
+ADMISSION_DEADLINES = {
+    "customize": float(os.getenv("ADMISSION_DEADLINE_CUSTOMIZE", "30")),
+    "regular": float(os.getenv("ADMISSION_DEADLINE_REGULAR", "15")),
+}
+# Generation time assumed until one has been observed
+ADMISSION_SERVICE_TIME_PRIOR = float(os.getenv("ADMISSION_SERVICE_TIME_PRIOR", "8"))
+SERVICE_TIME_ALPHA = 0.2
+WAIT_SAMPLES = 1000
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is shed; `retry_after` is in whole seconds
+    """
+
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), retry in {retry_after}s")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit with priority lanes and deadline-based load shedding
+
+    Args:
+        max_concurrent: Generations allowed to run at once
+        max_queue: Requests allowed to wait, across all lanes
+        deadlines: Lane name -> max wait in seconds, highest priority first
+    """
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENCY, max_queue: int = ADMISSION_MAX_QUEUE,
+                 deadlines: Dict[str, float] = None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.deadlines = dict(deadlines or ADMISSION_DEADLINES)
+        self.in_flight = 0
+        self.service_time = ADMISSION_SERVICE_TIME_PRIOR
+        self._queues = {lane: deque() for lane in self.deadlines}
+        self.admitted = {lane: 0 for lane in self.deadlines}
+        self.shed = {lane: {"queue_full": 0, "deadline": 0, "timed_out": 0} for lane in self.deadlines}
+        self._waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in self.deadlines}
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def estimated_wait(self, lane: str) -> float:
+        """
+        Expected wait for a new request in `lane`: everything queued in this
+        lane and the lanes above it goes first
+        """
+        ahead = 0
+        for name, queue in self._queues.items():
+            ahead += len(queue)
+            if name == lane:
+                break
+        return (ahead + 1) / self.max_concurrent * self.service_time
+
+    def _reject(self, lane: str, reason: str, wait: float):
+        self.shed[lane][reason] += 1
+        raise AdmissionRejected(lane, reason, max(1, math.ceil(wait)))
+
+    def check(self, lane: str):
+        """
+        Shed a request for `lane` now if it could not be served in time
+
+        Raises:
+            AdmissionRejected: The queue is full or the wait would exceed the deadline
+        """
+        if self.in_flight < self.max_concurrent and not self.queue_depth():
+            return
+        wait = self.estimated_wait(lane)
+        if self.queue_depth() >= self.max_queue:
+            self._reject(lane, "queue_full", wait)
+        if wait > self.deadlines[lane]:
+            self._reject(lane, "deadline", wait)
+
+    async def acquire(self, lane: str) -> float:
+        """
+        Wait for a generation slot; returns the admission time for release()
+
+        Raises:
+            AdmissionRejected: The request was shed
+        """
+        arrived = time.monotonic()
+        if self.in_flight < self.max_concurrent and not self.queue_depth():
+            self.in_flight += 1
+            return self._admitted(lane, arrived)
+
+        self.check(lane)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.deadlines[lane])
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self._handoff()
+            else:
+                waiter.cancel()
+                self._queues[lane].remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject(lane, "timed_out", self.estimated_wait(lane))
+            raise
+        return self._admitted(lane, arrived)
+
+    def _admitted(self, lane: str, arrived: float) -> float:
+        now = time.monotonic()
+        self.admitted[lane] += 1
+        self._waits[lane].append(now - arrived)
+        return now
+
+    def _handoff(self):
+        """
+        Give a freed slot to the first waiter of the highest-priority lane
+        """
+        for queue in self._queues.values():
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.in_flight -= 1
+
+    def release(self, admitted_at: float):
+        """
+        Free the slot taken by acquire() and learn from the generation time
+        """
+        elapsed = time.monotonic() - admitted_at
+        self.service_time += SERVICE_TIME_ALPHA * (elapsed - self.service_time)
+        self._handoff()
+
+    def snapshot(self) -> dict:
+        lanes = {}
+        for lane, waits in self._waits.items():
+            ordered = sorted(waits)
+            lanes[lane] = {
+                "queue_depth": len(self._queues[lane]),
+                "deadline_s": self.deadlines[lane],
+                "admitted": self.admitted[lane],
+                "shed": dict(self.shed[lane]),
+                "avg_wait_ms": round(sum(ordered) / len(ordered) * 1000, 1) if ordered else 0.0,
+                "p95_wait_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1) if ordered else 0.0
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self.queue_depth(),
+            "max_queue": self.max_queue,
+            "avg_generation_s": round(self.service_time, 2),
+            "lanes": lanes
+        }
+
+
+admission_controller = AdmissionController()
+
+
+def lane_for(use_groq: bool) -> str:
+    return "customize" if use_groq else "regular"
@@ -0,0 +1,114 @@
+"""
+/chat/batch throughput compared with the same questions sent as single calls
+
+Starts benchmarks/mock_providers.py and main.py, then answers one set of
+questions (with some repeats, as itinerary tools send them) three ways:
+
+    sequential  one /chat call after another
+    concurrent  single /chat calls, --parallelism of them at a time
+    batch       one /chat/batch call
+
+The caches are off, so every unique question reaches the mock providers.
+
+    python benchmarks/batch_throughput.py --items 40 --duplicates 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_suite import BACKEND_ENV  # noqa: E402
+from load_test import DESTINATIONS, free_port, start_backend, start_mock, stop  # noqa: E402
+
+TOPICS = ["things to do", "best time to visit", "hotels", "local food", "getting around"]
+
+
+def questions(items, duplicates):
+    unique = max(1, round(items * (1 - duplicates)))
+    pool = [
+        f"{TOPICS[i % len(TOPICS)]} in {DESTINATIONS[i // len(TOPICS) % len(DESTINATIONS)]} #{i}"
+        for i in range(unique)
+    ]
+    return [{"message": pool[i % unique], "chat_history": [], "use_groq": False} for i in range(items)]
+
+
+async def sequential(client, url, items):
+    statuses = []
+    for item in items:
+        statuses.append((await client.post(url, json=item)).status_code)
+    return statuses
+
+
+async def concurrent(client, url, items, parallelism):
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def one(item):
+        async with semaphore:
+            return (await client.post(url, json=item)).status_code
+    return await asyncio.gather(*(one(item) for item in items))
+
+
+async def batch(client, url, items):
+    response = await client.post(url, json={"requests": items})
+    response.raise_for_status()
+    return [result["status"] for result in response.json()["results"]]
+
+
+async def run(base_url, items, parallelism):
+    results = {}
+    async with httpx.AsyncClient(timeout=600, limits=httpx.Limits(max_connections=parallelism)) as client:
+        modes = {
+            "sequential": lambda: sequential(client, f"{base_url}/chat", items),
+            "concurrent": lambda: concurrent(client, f"{base_url}/chat", items, parallelism),
+            "batch": lambda: batch(client, f"{base_url}/chat/batch", items),
+        }
+        for mode, call in modes.items():
+            start = time.perf_counter()
+            statuses = await call()
+            elapsed = time.perf_counter() - start
+            ok = sum(1 for status in statuses if status == 200)
+            results[mode] = {
+                "elapsed_s": round(elapsed, 3),
+                "answered": ok,
+                "errors": len(statuses) - ok,
+                "throughput_rps": round(ok / elapsed, 2),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=40, help="Questions per run")
+    parser.add_argument("--duplicates", type=float, default=0.25, help="Fraction of repeated questions")
+    parser.add_argument("--parallelism", type=int, default=8, help="CHAT_BATCH_PARALLELISM and concurrent calls")
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="Mock provider latency spec")
+    args = parser.parse_args()
+
+    mock_port, backend_port = free_port(), free_port()
+    processes = [start_mock(mock_port, ["--latency", args.latency, "--seed", "7"])]
+    try:
+        env = dict(BACKEND_ENV, CHAT_BATCH_PARALLELISM=str(args.parallelism))
+        processes.append(start_backend("main", backend_port, f"http://127.0.0.1:{mock_port}", env))
+        items = questions(args.items, args.duplicates)
+        results = asyncio.run(run(f"http://127.0.0.1:{backend_port}", items, args.parallelism))
+    finally:
+        stop(processes)
+    print(json.dumps({
+        "items": args.items,
+        "unique": len({item["message"] for item in items}),
+        "parallelism": args.parallelism,
+        "mock_latency": args.latency,
+        "modes": results,
+        "batch_speedup_vs_sequential": round(results["sequential"]["elapsed_s"] / results["batch"]["elapsed_s"], 2),
+        "batch_speedup_vs_concurrent": round(results["concurrent"]["elapsed_s"] / results["batch"]["elapsed_s"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Chain construction cost and steady-state latency in fallback_main.py
+
+Compares the old per-request path (build a HuggingFaceEndpoint and chain,
+then a blocking `invoke` on the event loop) with the pooled chains driven
+through `ainvoke`. Generation goes to benchmarks/mock_providers.py, reached
+through HF_ENDPOINT and HF_INFERENCE_ENDPOINT, so no token or network access is needed.
+Needs the langchain packages from requirements.txt.
+
+    python benchmarks/chain_pool.py --concurrency 8 --requests 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import timeit
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from load_test import DESTINATIONS, free_port, percentile, start_mock, stop  # noqa: E402
+
+
+def per_request_chain(backend):
+    """
+    What generate_response did on every request before the pool
+    """
+    return backend.prompt | backend.build_llm(backend.RESPONSE_PARAMS) | backend.StrOutputParser()
+
+
+async def drive(generate, concurrency, total):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await generate({
+                "chat_history": "",
+                "user_question": f"Things to do in {DESTINATIONS[i % len(DESTINATIONS)]} #{i}",
+            })
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+    }
+
+
+async def run(backend, args):
+    async def per_request(inputs):
+        # Build and invoke on the event loop, as the old code did
+        return per_request_chain(backend).invoke(inputs)
+
+    async def pooled(inputs):
+        chain = await backend.chain_pool.get()
+        return await chain.ainvoke(inputs)
+
+    started = time.perf_counter()
+    await backend.chain_pool.warm(backend.CHAIN_PRESETS)
+    warm_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(10000):
+        await backend.chain_pool.get()
+    lookup = (time.perf_counter() - started) / 10000
+    return {
+        "warm_ms": round(warm_seconds * 1000, 1),
+        "pooled_chains": backend.chain_pool.stats()["chains"],
+        "pooled_lookup_us": round(lookup * 1e6, 2),
+        "per_request_blocking": await drive(per_request, args.concurrency, args.requests),
+        "pooled_ainvoke": await drive(pooled, args.concurrency, args.requests),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", default="fixed:0.25", help="Mock provider latency spec")
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock = start_mock(mock_port, ["--latency", args.latency])
+    try:
+        # Both must be set before huggingface_hub is imported
+        os.environ["HF_INFERENCE_ENDPOINT"] = f"http://127.0.0.1:{mock_port}"
+        os.environ["HF_ENDPOINT"] = f"http://127.0.0.1:{mock_port}"
+        os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "stub")
+        import fallback_main as backend
+
+        construction = timeit.timeit(lambda: per_request_chain(backend), number=20) / 20
+        result = {
+            "construction_ms": round(construction * 1000, 2),
+            "mock_latency": args.latency,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            **asyncio.run(run(backend, args)),
+        }
+    finally:
+        stop([mock])
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
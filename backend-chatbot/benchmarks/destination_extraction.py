@@ -0,0 +1,87 @@
+"""
+Entity extraction time of destination_store.py for growing catalogs
+
+Builds synthetic catalogs (multi-word names, aliases and five attractions
+per place) and times DestinationStore.extract on messages that name a place,
+name one of its attractions, or name nothing. Extraction should stay well
+under a millisecond per message and roughly flat as the catalog grows.
+
+    python benchmarks/destination_extraction.py --sizes 5,1000,10000,50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from destination_store import DestinationStore  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "tan", "vel", "dor", "sen", "pur", "gan", "bel", "ori", "zu", "na", "ste"]
+SIGHTS = ["Temple", "Museum", "Fort", "Market", "Lake", "Palace", "Gardens", "Beach", "Tower", "Bridge"]
+
+
+def word(rng):
+    return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+
+
+def synthetic_store(size, seed=7):
+    rng = random.Random(seed)
+    store = DestinationStore()
+    names = []
+    while len(store.destinations) < size:
+        name = " ".join(word(rng) for _ in range(rng.randint(1, 2)))
+        if store.get(name) is not None:
+            continue
+        store.add(
+            name,
+            [f"{word(rng)} {rng.choice(SIGHTS)}" for _ in range(5)],
+            [f"{word(rng)} Hotel" for _ in range(3)],
+            "Mild climate",
+            [word(rng) for _ in range(rng.randint(0, 2))],
+        )
+        names.append(name)
+    return store, names
+
+
+def messages(store, names, rng):
+    place = store.get(rng.choice(names))
+    return [
+        f"Can you suggest hotels in {place.name} for a family of four?",
+        f"How long should we spend at {place.attractions[2]} and is it worth it?",
+        "What are some good tips for traveling on a budget this winter with kids?",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="5,1000,10000,50000", help="Catalog sizes")
+    parser.add_argument("--number", type=int, default=2000, help="Timing rounds per message")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        start = time.perf_counter()
+        store, names = synthetic_store(size)
+        build_s = time.perf_counter() - start
+        sample = messages(store, names, rng)
+        per_message = [timeit.timeit(lambda: store.extract(m), number=args.number) / args.number for m in sample]
+        results.append({
+            "destinations": size,
+            "indexed_phrases": store.index.size,
+            "build_ms": round(build_s * 1000, 1),
+            "extract_us": {
+                kind: round(seconds * 1e6, 2)
+                for kind, seconds in zip(("by_name", "by_attraction", "no_place"), per_message)
+            },
+            "found": [[d.name for d in store.extract(m)] for m in sample[:2]],
+        })
+    print(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
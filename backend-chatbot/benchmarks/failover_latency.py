@@ -0,0 +1,81 @@
+"""
+Tail latency of the provider fallback chain under injected faults
+
+Runs main.py against benchmarks/mock_providers.py with fault injection
+switched on (see fault_injection.py). Each scenario gets a fresh backend, so
+circuit breakers, retry budgets and routing scores start clean, and sets its
+rules through FAULT_INJECTION. Reported per scenario: p50/p95/p99 of the
+successful requests, p99 and worst case over all requests (a user waits for
+an error too), the error rate and how many faults were actually injected.
+
+    python benchmarks/failover_latency.py --requests 40
+    python benchmarks/failover_latency.py --scenarios hf_503_groq_429 --env PROVIDER_MAX_ATTEMPTS=2
+
+Retries use their real backoff, so the failing scenarios take a while.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_suite import BACKEND_ENV  # noqa: E402
+from load_test import drive, free_port, start_backend, start_mock, stop  # noqa: E402
+
+# name -> (FAULT_INJECTION rules, use_groq)
+SCENARIOS = {
+    "healthy": ("", False),
+    "hf_503": ("huggingface:status=503", False),
+    "hf_503_groq_429": ("huggingface:status=503;groq:status=429", False),
+    "customize_groq_429": ("groq:status=429", True),
+    "hf_timeout": ("huggingface:timeout=5", False),
+    "hf_reset": ("huggingface:reset@0.5", False),
+    "truncated_json": ("huggingface:truncate@0.5;groq:truncate@0.5", False),
+    "groq_slow": ("groq:latency=3@0.3", True),
+}
+
+
+def run_scenario(name, upstream, concurrency, requests, extra_env):
+    rules, use_groq = SCENARIOS[name]
+    port = free_port()
+    env = dict(BACKEND_ENV, PROVIDER_RETRY_BASE_DELAY="1", FAULT_INJECTION_ENABLED="true",
+               FAULT_INJECTION=rules, **extra_env)
+    process = start_backend("main", port, upstream, env)
+    try:
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}/chat", concurrency, requests, use_groq))
+        result["injected"] = httpx.get(f"http://127.0.0.1:{port}/admin/faults").json()["injected"]
+    finally:
+        stop([process])
+    return dict({"faults": rules, "use_groq": use_groq}, **result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Any of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=40, help="Requests per scenario")
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="Mock provider latency spec")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the backend, repeatable")
+    args = parser.parse_args()
+
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    mock_port = free_port()
+    mock = start_mock(mock_port, ["--latency", args.latency, "--seed", "7"])
+    results = {}
+    try:
+        for name in args.scenarios.split(","):
+            print(f"{name} ...", file=sys.stderr, flush=True)
+            results[name] = run_scenario(
+                name, f"http://127.0.0.1:{mock_port}", args.concurrency, args.requests, extra_env
+            )
+    finally:
+        stop([mock])
+    print(json.dumps({"mock_latency": args.latency, "backend_env": extra_env, "scenarios": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-message cost of intent matching as the keyword table grows
+
+Pads the default table in intent_engine.py with synthetic keywords and
+phrases, then times IntentEngine.match against the old approach of
+substring checks, one per keyword, on the lowercased message. The engine
+should stay roughly flat while the substring scan grows with the table.
+
+    python benchmarks/intent_matching.py --sizes 50,1000,10000,50000
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_engine import INTENT_KEYWORDS, IntentEngine  # noqa: E402
+
+MESSAGES = [
+    "hi",
+    "Can you suggest a good hotel in Paris near the Eiffel Tower?",
+    "I want to plan a 5 day itinerary for Tokyo with my family in April",
+    "What's the weather like in Dubai in July, and what should I pack?",
+    "Are there any cheap flights from Mumbai to Bali next month?",
+    "Tell me something interesting about traveling on a budget across south east asia this winter",
+]
+
+
+def synthetic_table(size, seed=7):
+    """
+    The default table padded with random keywords up to `size` entries
+    """
+    rng = random.Random(seed)
+    table = {intent: dict(phrases) for intent, phrases in INTENT_KEYWORDS.items()}
+    intents = list(table)
+    count = sum(len(phrases) for phrases in table.values())
+    while count < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 3))]
+        phrases = table[rng.choice(intents)]
+        phrase = " ".join(words)
+        if phrase not in phrases:
+            phrases[phrase] = 1.0
+            count += 1
+    return table
+
+
+def substring_matcher(table):
+    """
+    The old approach: check every keyword as a substring, first intent wins
+    """
+    checks = [(intent, list(phrases)) for intent, phrases in table.items()]
+
+    def match(message):
+        lower = message.lower()
+        for intent, phrases in checks:
+            if any(phrase in lower for phrase in phrases):
+                return intent
+        return None
+    return match
+
+
+def per_message_us(match, number):
+    elapsed = timeit.timeit(lambda: [match(message) for message in MESSAGES], number=number)
+    return round(elapsed / (number * len(MESSAGES)) * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,1000,10000,50000", help="Keyword table sizes")
+    parser.add_argument("--number", type=int, default=2000, help="Timing rounds over the message set")
+    args = parser.parse_args()
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        table = synthetic_table(size)
+        compile_s = timeit.timeit(lambda: IntentEngine(table), number=1)
+        engine = IntentEngine(table)
+        results.append({
+            "keywords": engine.size,
+            "compile_ms": round(compile_s * 1000, 1),
+            "engine_us_per_message": per_message_us(engine.match, args.number),
+            "substring_us_per_message": per_message_us(substring_matcher(table), max(1, args.number // 20)),
+        })
+    print(json.dumps({"messages": len(MESSAGES), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Latency and tokens of short-answer handling in fallback_main.py
+
+Runs a fixed query set through two strategies for answers under
+MIN_RESPONSE_WORDS words:
+
+    regenerate  the old behaviour: throw the answer away and generate again
+    continue    fallback_main.generate_answer: ask only for the missing part
+
+Generation goes to benchmarks/mock_providers.py through
+HF_ENDPOINT and HF_INFERENCE_ENDPOINT. The mock stops a share of answers early
+(--short-answers) and charges time per generated token (--token-latency),
+and it is restarted with the same seed for each strategy, so both see the
+same first answers. Needs the langchain packages from requirements.txt.
+
+    python benchmarks/length_extension.py --queries 50 --short-answers 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from load_test import DESTINATIONS, free_port, percentile, start_mock, stop  # noqa: E402
+from token_counter import count_tokens  # noqa: E402
+
+TOPICS = ["things to do", "a 3 day itinerary", "where to stay", "local food", "getting around"]
+QUERIES = [f"{topic} in {destination}" for destination in DESTINATIONS for topic in TOPICS]
+
+
+async def regenerate(backend, message):
+    inputs = {"chat_history": "", "user_question": message}
+    chain = await backend.chain_pool.get()
+    response = backend.clean_response(await chain.ainvoke(inputs))
+    generated = count_tokens(response)
+    if len(response.split()) < backend.MIN_RESPONSE_WORDS:
+        response = backend.clean_response(await chain.ainvoke(inputs))
+        generated += count_tokens(response)
+    return response, generated
+
+
+async def run_strategy(backend, strategy, queries):
+    # As at app startup, so no request pays for building a chain
+    await backend.chain_pool.warm(backend.CHAIN_PRESETS)
+    latencies, tokens, short = [], [], 0
+    for message in queries:
+        start = time.perf_counter()
+        response, generated = await strategy(backend, message)
+        latencies.append(time.perf_counter() - start)
+        tokens.append(generated)
+        short += len(response.split()) < backend.MIN_RESPONSE_WORDS
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "mean_generated_tokens": round(statistics.mean(tokens), 1),
+        "p95_generated_tokens": percentile(sorted(tokens), 0.95),
+        "still_short": short,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--short-answers", type=float, default=0.3, help="Share of answers the mock stops early")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Mock seconds per generated token")
+    parser.add_argument("--latency", default="fixed:0.2", help="Mock time to first token")
+    args = parser.parse_args()
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+    mock_args = [
+        "--latency", args.latency, "--token-latency", str(args.token_latency),
+        "--short-answers", str(args.short_answers), "--seed", "7",
+    ]
+    port = free_port()
+    # Set before huggingface_hub is imported; the same port is reused for each mock run
+    os.environ["HF_INFERENCE_ENDPOINT"] = f"http://127.0.0.1:{port}"
+    os.environ["HF_ENDPOINT"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "stub")
+    import fallback_main as backend
+
+    results = {}
+    for name, strategy in (("regenerate", regenerate), ("continue", lambda b, m: b.generate_answer(m))):
+        mock = start_mock(port, mock_args)
+        try:
+            results[name] = asyncio.run(run_strategy(backend, strategy, queries))
+        finally:
+            stop([mock])
+
+    print(json.dumps({
+        "queries": args.queries,
+        "mock": mock_args,
+        "min_response_words": backend.MIN_RESPONSE_WORDS,
+        "extension_max_tokens": backend.EXTENSION_MAX_TOKENS,
+        "strategies": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
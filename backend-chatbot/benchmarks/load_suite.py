@@ -0,0 +1,152 @@
+"""
+Load-testing suite: every backend, increasing concurrency, several failure modes
+
+For each scenario a fresh benchmarks/mock_providers.py is started with the
+scenario's latency and failure settings; each backend module is launched
+against it and driven at every concurrency level in turn. Results (throughput,
+p50/p95/p99 latency, error rate and status counts per level) are written as
+JSON, and a previous run can be passed as a baseline to print the change:
+
+    python benchmarks/load_suite.py --output results.json
+    python benchmarks/load_suite.py --output new.json --baseline results.json
+
+A backend that cannot start (for example fallback_main.py without langchain
+installed) is reported with its error instead of aborting the suite.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import drive, free_port, start_backend, start_mock, stop  # noqa: E402
+
+SCENARIOS = {
+    "steady": ["--latency", "lognormal:0.8,0.4"],
+    "hf_loading": ["--latency", "lognormal:0.8,0.4", "--fault", "huggingface:503:0.3"],
+    "hf_payment_required": ["--latency", "lognormal:0.8,0.4", "--fault", "huggingface:402:1.0"],
+    "groq_rate_limited": ["--latency", "lognormal:0.8,0.4", "--fault", "groq:429:0.2"],
+}
+
+# Measure the backend's own behaviour against the mock: no answers from the
+# response caches and no client-side quotas in front of the mock's 429s
+BACKEND_ENV = {
+    "SEMANTIC_CACHE_ENABLED": "false",
+    "RESPONSE_CACHE_MAX_ENTRIES": "0",
+    "GROQ_RPM": "0",
+    "GROQ_TPM": "0",
+    "HUGGINGFACE_RPM": "0",
+    "HUGGINGFACE_TPM": "0",
+    "PROVIDER_RETRY_BASE_DELAY": "0.25",
+}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_backend(module, upstream, levels, requests, use_groq):
+    port = free_port()
+    log_path = os.path.join(tempfile.gettempdir(), f"load_suite_{module}.log")
+    try:
+        process = start_backend(module, port, upstream, BACKEND_ENV, log_path)
+    except RuntimeError as e:
+        with open(log_path) as log:
+            tail = log.read().strip().splitlines()[-1:] or [""]
+        return {"error": f"{e}: {tail[0]}"}
+    try:
+        url = f"http://127.0.0.1:{port}/chat"
+        return {"levels": [asyncio.run(drive(url, level, requests, use_groq)) for level in levels]}
+    finally:
+        stop([process])
+
+
+def compare(current, baseline):
+    """
+    Per scenario/backend/level change in throughput and p95 against a baseline run
+    """
+    lines = []
+    for scenario, backends in current["scenarios"].items():
+        for module, result in backends.items():
+            old = baseline.get("scenarios", {}).get(scenario, {}).get(module, {})
+            old_levels = {level["concurrency"]: level for level in old.get("levels", [])}
+            for level in result.get("levels", []):
+                before = old_levels.get(level["concurrency"])
+                if not before or not before["throughput_rps"] or not before["p95_ms"] or not level["p95_ms"]:
+                    continue
+                lines.append(
+                    f"{scenario:22} {module:14} c={level['concurrency']:<4} "
+                    f"rps {before['throughput_rps']:>8} -> {level['throughput_rps']:<8} "
+                    f"({(level['throughput_rps'] / before['throughput_rps'] - 1) * 100:+.1f}%)  "
+                    f"p95 {before['p95_ms']:>8} -> {level['p95_ms']:<8} "
+                    f"({(level['p95_ms'] / before['p95_ms'] - 1) * 100:+.1f}%)"
+                )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="main,fallback_main,simple_main")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Any of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", default="1,5,10,25,50", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument("--use-groq", action="store_true", help="Send customize-plan requests")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON results here")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "concurrency": levels,
+            "requests_per_level": args.requests,
+            "use_groq": args.use_groq,
+            "backend_env": BACKEND_ENV,
+        },
+        "scenarios": {},
+    }
+
+    for scenario in args.scenarios.split(","):
+        mock_port = free_port()
+        mock = start_mock(mock_port, SCENARIOS[scenario] + ["--seed", str(args.seed)])
+        report["scenarios"][scenario] = {"mock_args": SCENARIOS[scenario]}
+        try:
+            for module in args.backends.split(","):
+                print(f"{scenario}: {module} ...", file=sys.stderr, flush=True)
+                report["scenarios"][scenario][module] = run_backend(
+                    module, f"http://127.0.0.1:{mock_port}", levels, args.requests, args.use_groq
+                )
+        finally:
+            stop([mock])
+        del report["scenarios"][scenario]["mock_args"]
+        report["config"].setdefault("mock_args", {})[scenario] = SCENARIOS[scenario]
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print("\n".join(compare(report, baseline)) or "No comparable levels in the baseline", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
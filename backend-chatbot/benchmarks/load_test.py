@@ -0,0 +1,189 @@
+"""
+Concurrent /chat load test against local stand-in providers
+
+Starts benchmarks/mock_providers.py, which speaks the Hugging Face inference
+and Groq chat-completions protocols with a fixed delay, launches the chat
+backend pointed at it, and fires concurrent /chat requests. Run it once on
+the old code and once on the new code to compare throughput:
+
+    python benchmarks/load_test.py --concurrency 20 --requests 100
+
+benchmarks/load_suite.py builds on the helpers here to sweep concurrency
+levels across backends and failure modes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# The backend is started through this launcher so the provider URLs can be
+# redirected to the mock on any revision of main.py, old or new.
+# HF_ENDPOINT (token checks) and HF_INFERENCE_ENDPOINT (generation) redirect
+# huggingface_hub, which fallback_main.py reaches through langchain.
+LAUNCHER_SOURCE = """
+import os
+import sys
+import uvicorn
+
+upstream = sys.argv[2]
+os.environ["HF_INFERENCE_ENDPOINT"] = upstream
+os.environ["HF_ENDPOINT"] = upstream
+import {module} as backend
+
+if hasattr(backend, "HF_API_URL"):
+    backend.HF_API_URL = upstream + "/models/" + backend.HF_MODEL_NAME
+if hasattr(backend, "GROQ_API_URL"):
+    backend.GROQ_API_URL = upstream + "/openai/v1/chat/completions"
+uvicorn.run(backend.app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+DESTINATIONS = ["Paris", "Tokyo", "Goa", "London", "New York", "Bali", "Rome", "Dubai", "Kerala", "Sydney"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30.0, process=None):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server for port {port} exited with code {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+
+def start_mock(port, mock_args=()):
+    """
+    Start benchmarks/mock_providers.py on `port`
+    """
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCHMARKS_DIR, "mock_providers.py"), "--port", str(port), *mock_args],
+        stdout=subprocess.DEVNULL,
+    )
+    wait_for_port(port, process=process)
+    return process
+
+
+def start_backend(module, port, upstream, env=None, log_path=None):
+    """
+    Launch a backend module with its providers pointed at `upstream`
+    """
+    env = dict(os.environ, HUGGINGFACEHUB_API_TOKEN="stub", GROQ_API_KEY="stub", **(env or {}))
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, "-c", LAUNCHER_SOURCE.format(module=module), str(port), upstream],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=log,
+    )
+    wait_for_port(port, process=process)
+    return process
+
+
+def stop(processes):
+    for process in processes:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+async def drive(url, concurrency, total, use_groq, timeout=300):
+    """
+    Send `total` /chat requests with at most `concurrency` in flight
+    """
+    latencies = []
+    # Failed requests too: a user waits just as long for an error
+    all_latencies = []
+    statuses = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(url, json={
+                        "message": f"Things to do in {DESTINATIONS[i % len(DESTINATIONS)]} #{i}",
+                        "chat_history": [],
+                        "use_groq": use_groq,
+                    })
+                    statuses[str(response.status_code)] += 1
+                    if response.is_success:
+                        latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                all_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    all_latencies.sort()
+    errors = total - len(latencies)
+    ms = lambda value: round(value * 1000, 1) if value is not None else None  # noqa: E731
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "error_rate": round(errors / total, 4),
+        "status_counts": dict(statuses),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": ms(statistics.median(latencies)) if latencies else None,
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "p99_all_ms": ms(percentile(all_latencies, 0.99)),
+        "max_all_ms": ms(all_latencies[-1] if all_latencies else None),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="Backend module to launch (default: main)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--upstream-delay", type=float, default=0.25, help="Stub provider latency in seconds")
+    parser.add_argument("--use-groq", action="store_true", help="Send customize-plan (Groq only) requests")
+    args = parser.parse_args()
+
+    mock_port, backend_port = free_port(), free_port()
+    processes = [start_mock(mock_port, ["--latency", f"fixed:{args.upstream_delay}"])]
+    try:
+        processes.append(start_backend(args.module, backend_port, f"http://127.0.0.1:{mock_port}"))
+        result = asyncio.run(drive(
+            f"http://127.0.0.1:{backend_port}/chat", args.concurrency, args.requests, args.use_groq
+        ))
+        result["upstream_delay_s"] = args.upstream_delay
+        print(json.dumps(result, indent=2))
+    finally:
+        stop(processes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+CPU overhead of metrics recording
+
+Drives /chat in-process with the provider calls replaced by instant stubs,
+so the measured CPU is the backend's own work per request (prompt
+rendering, history, caching, dispatch, selection) with nothing hidden behind
+network waits. Metrics are switched on and off on alternate requests, so
+drift over the run affects both sides equally. The cost of exactly what one
+request records is also timed on its own, which is the more precise figure:
+the end-to-end difference is within run-to-run noise.
+
+    python benchmarks/metrics_overhead.py --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Every request must reach the providers, so both caches stay out of the way
+os.environ.setdefault("SEMANTIC_CACHE_ENABLED", "false")
+os.environ.setdefault("RESPONSE_CACHE_MAX_ENTRIES", "1")
+# and so do the client-side provider quotas
+for name in ("GROQ_RPM", "GROQ_TPM", "HUGGINGFACE_RPM", "HUGGINGFACE_TPM"):
+    os.environ.setdefault(name, "0")
+
+import httpx  # noqa: E402
+
+import main as backend  # noqa: E402
+import metrics  # noqa: E402
+
+ANSWER = "DESTINATION OVERVIEW\n" + "Paris has plenty to see. " * 120
+
+
+async def stub_provider(*args, **kwargs):
+    return {"success": True, "response": ANSWER, "model": "groq", "model_name": "groq/stub", "input_tokens": 850}
+
+
+def record_one_request():
+    """
+    Everything the middleware and call_with_breaker record for one /chat
+    request answered by a fan-out to both providers
+    """
+    metrics.http_in_flight.inc("/chat")
+    metrics.observe_provider_call("groq", 0.8, {"success": True})
+    metrics.observe_provider_call("huggingface", 1.2, {"success": False, "status_code": 503})
+    metrics.http_in_flight.dec("/chat")
+    metrics.http_requests.inc("/chat", "200")
+    metrics.http_request_duration.observe(1.2, "/chat")
+    metrics.http_response_size.observe(3100, "/chat")
+
+
+async def run(args):
+    backend._query_groq = stub_provider
+    backend._query_huggingface = stub_provider
+    for config in backend.MODELS.values():
+        config["enabled"] = True
+
+    cpu = {True: 0.0, False: 0.0}
+    async with httpx.AsyncClient(app=backend.app, base_url="http://bench") as client:
+        for i in range(args.requests + 200):
+            enabled = i % 2 == 0
+            metrics.METRICS_ENABLED = enabled
+            start = time.process_time()
+            response = await client.post("/chat", json={"message": f"things to do in Paris {i}"})
+            elapsed = time.process_time() - start
+            response.raise_for_status()
+            if i >= 200:  # warm-up
+                cpu[enabled] += elapsed
+    metrics.METRICS_ENABLED = True
+
+    on = cpu[True] / (args.requests / 2)
+    off = cpu[False] / (args.requests / 2)
+    recording = timeit.timeit(record_one_request, number=100000) / 100000
+    return {
+        "requests": args.requests,
+        "cpu_us_per_request_metrics_off": round(off * 1e6, 1),
+        "cpu_us_per_request_metrics_on": round(on * 1e6, 1),
+        "end_to_end_overhead_pct": round((on - off) / off * 100, 2),
+        "recording_us_per_request": round(recording * 1e6, 2),
+        "recording_overhead_pct": round(recording / off * 100, 3),
+        "scrape_ms": round(timeit.timeit(metrics.registry.render, number=100) * 10, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    logging.getLogger("yatra-sevak").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
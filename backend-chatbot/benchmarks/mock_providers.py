@@ -0,0 +1,245 @@
+"""
+Local stand-in for the Hugging Face inference and Groq chat-completions APIs
+
+Serves both protocols from one process, with a configurable latency
+distribution per provider and failures injected at given probabilities:
+
+    503  Hugging Face "model is loading" (with estimated_time)
+    402  payment required / subscription lapsed
+    429  rate limited, with a Retry-After header
+
+Run it on its own to point a backend at it by hand:
+
+    python benchmarks/mock_providers.py --port 9000 --latency lognormal:0.8,0.4 \\
+        --fault huggingface:503:0.2 --fault groq:429:0.05
+
+Latency specs: fixed:S, uniform:LOW,HIGH, normal:MEAN,STDDEV or
+lognormal:MEDIAN,SIGMA, all in seconds. --hf-latency and --groq-latency
+override --latency for one provider.
+
+Answers are cut to the request's max_new_tokens, and --token-latency adds
+time per generated token. Requests with "stream": true get Server-Sent
+Events in each provider's format (Hugging Face `token` events, Groq
+`choices[].delta.content` chunks ending with `data: [DONE]`), spaced by
+--token-latency, so /chat/stream and time to first token can be measured. With --short-answers P a Hugging Face generation
+stops after SHORT_ANSWER_WORDS words with probability P. A prompt that
+contains CONTINUATION_MARKER is answered with the rest of the full answer.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+PROVIDERS = ("huggingface", "groq")
+FAULT_STATUSES = (503, 402, 429)
+
+ANSWER = (
+    "No current crisis situations reported in this area.\n\n"
+    "DESTINATION OVERVIEW\n" + "A lively city with plenty to see and do. " * 25 + "\n\n"
+    "ACCOMMODATION\n" + "Stay near the old town for easy access to sights. " * 20 + "\n\n"
+    "TRANSPORTATION\n" + "The metro is the quickest way around. " * 20 + "\n\n"
+    "ACTIVITIES AND ATTRACTIONS\n" + "Visit the museums early in the morning. " * 20 + "\n\n"
+    "PRACTICAL TRAVEL TIPS\n" + "Carry some cash for small vendors. " * 20
+)
+
+
+SHORT_ANSWER_WORDS = 60
+# fallback_main.py's continuation prompt carries the partial answer after this
+CONTINUATION_MARKER = "Your answer so far:"
+
+
+def approx_tokens(text):
+    return len(text) // 4
+
+
+def generate_hf(inputs, parameters, short_probability):
+    """
+    The generated text for a Hugging Face request
+    """
+    words = ANSWER.split(" ")
+    if CONTINUATION_MARKER in inputs:
+        words = words[SHORT_ANSWER_WORDS:]
+    if random.random() < short_probability:
+        words = words[:SHORT_ANSWER_WORDS]
+    text = " ".join(words)
+    max_new_tokens = parameters.get("max_new_tokens")
+    if max_new_tokens:
+        text = text[:max_new_tokens * 4]
+    return text
+
+
+def stream_pieces(text):
+    """
+    The text split into word-sized chunks that join back to it
+    """
+    words = text.split(" ")
+    return [words[0]] + [" " + word for word in words[1:]] if text else []
+
+
+def hf_events(text):
+    for index, piece in enumerate(stream_pieces(text)):
+        yield {"token": {"id": index, "text": piece, "logprob": 0.0, "special": False}, "generated_text": None}
+    yield {"token": {"id": 2, "text": "</s>", "logprob": 0.0, "special": True}, "generated_text": text}
+
+
+def groq_events(text):
+    for piece in stream_pieces(text):
+        yield {"choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+    yield {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+
+
+def parse_latency(spec):
+    """
+    Turn a latency spec such as "lognormal:0.8,0.4" into a sampling function
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda: max(random.gauss(values[0], values[1]), 0.0)
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def parse_fault(spec):
+    """
+    "huggingface:503:0.2" -> ("huggingface", 503, 0.2)
+    """
+    provider, status, probability = spec.split(":")
+    if provider not in PROVIDERS or int(status) not in FAULT_STATUSES:
+        raise ValueError(f"Unsupported fault: {spec}")
+    return provider, int(status), float(probability)
+
+
+def pick_fault(faults):
+    """
+    Status to fail with, or None; faults are (status, probability) pairs
+    """
+    roll = random.random()
+    for status, probability in faults:
+        if roll < probability:
+            return status
+        roll -= probability
+    return None
+
+
+def fault_response(status):
+    if status == 503:
+        body = {"error": "Model is currently loading", "estimated_time": 20.0}
+        return JSONResponse(body, status_code=503)
+    if status == 402:
+        return JSONResponse({"error": "Payment required"}, status_code=402)
+    body = {"error": {"message": "Rate limit reached, please try again", "type": "requests", "code": "rate_limit_exceeded"}}
+    return JSONResponse(body, status_code=429, headers={"retry-after": "1"})
+
+
+def create_app(latency, faults, token_latency=0.0, short_probability=0.0):
+    """
+    Args:
+        latency: Provider -> sampling function returning seconds
+        faults: Provider -> list of (status, probability)
+        token_latency: Extra seconds per generated token
+        short_probability: Chance that a Hugging Face answer stops early
+    """
+    app = FastAPI()
+    counts = {provider: {"requests": 0} for provider in PROVIDERS}
+
+    async def respond(provider, ok_body, tokens, events=None):
+        """
+        Args:
+            events: Stream events for a "stream": true request, sent instead of `ok_body`
+        """
+        counts[provider]["requests"] += 1
+        counts[provider]["tokens"] = counts[provider].get("tokens", 0) + tokens
+        # A stream pays for its tokens while they are sent
+        await asyncio.sleep(latency[provider]() + (0 if events is not None else token_latency * tokens))
+        status = pick_fault(faults[provider])
+        if status is not None:
+            counts[provider][str(status)] = counts[provider].get(str(status), 0) + 1
+            return fault_response(status)
+        if events is None:
+            return ok_body
+        counts[provider]["streams"] = counts[provider].get("streams", 0) + 1
+        return StreamingResponse(sse(provider, events), media_type="text/event-stream")
+
+    async def sse(provider, events):
+        for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+            if token_latency:
+                await asyncio.sleep(token_latency * max(1, approx_tokens(event_text(event))))
+        if provider == "groq":
+            yield "data: [DONE]\n\n"
+
+    def event_text(event):
+        if "token" in event:
+            return event["token"]["text"]
+        return event["choices"][0]["delta"].get("content", "")
+
+    @app.post("/models/{model:path}")
+    async def huggingface(model: str, payload: dict):
+        text = generate_hf(str(payload.get("inputs", "")), payload.get("parameters") or {}, short_probability)
+        events = hf_events(text) if payload.get("stream") else None
+        return await respond("huggingface", [{"generated_text": text}], approx_tokens(text), events)
+
+    @app.post("/openai/v1/chat/completions")
+    async def groq(payload: dict):
+        prompt_tokens = sum(len(m.get("content", "")) for m in payload.get("messages", [])) // 4
+        text = ANSWER[:payload["max_tokens"] * 4] if payload.get("max_tokens") else ANSWER
+        events = groq_events(text) if payload.get("stream") else None
+        return await respond("groq", {
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": approx_tokens(text)}
+        }, approx_tokens(text), events)
+
+    # huggingface_hub checks the token here (HF_ENDPOINT) when a HuggingFaceEndpoint is built
+    @app.get("/api/whoami-v2")
+    async def whoami():
+        return {"type": "user", "name": "mock", "auth": {"type": "access_token", "accessToken": {"role": "read"}}}
+
+    @app.get("/stats")
+    async def stats():
+        return counts
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default="fixed:0.25")
+    parser.add_argument("--hf-latency")
+    parser.add_argument("--groq-latency")
+    parser.add_argument("--fault", action="append", default=[], help="PROVIDER:STATUS:PROBABILITY, repeatable")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Extra seconds per generated token")
+    parser.add_argument("--short-answers", type=float, default=0.0, help="Probability a HF answer stops early")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    latency = {
+        "huggingface": parse_latency(args.hf_latency or args.latency),
+        "groq": parse_latency(args.groq_latency or args.latency),
+    }
+    faults = {provider: [] for provider in PROVIDERS}
+    for spec in args.fault:
+        provider, status, probability = parse_fault(spec)
+        faults[provider].append((status, probability))
+
+    print(json.dumps({"mock_providers": args.port, "faults": faults}), flush=True)
+    app = create_app(latency, faults, args.token_latency, args.short_answers)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Deterministic /chat benchmark from recorded provider traffic
+
+Drives the backend in PROVIDER_RECORDING=replay mode, so no network access
+or API keys are needed and every run sees the same upstream responses and
+latency profile. Each latency scale is run --repeat times to show how
+reproducible the numbers are.
+
+Record real traffic first by running the backend with
+PROVIDER_RECORDING=record (see the README), or capture a synthetic recording
+from benchmarks/mock_providers.py with --capture:
+
+    python benchmarks/replay_benchmark.py --capture --recording /tmp/providers.jsonl.gz
+    python benchmarks/replay_benchmark.py --recording /tmp/providers.jsonl.gz --scales 1,0.5,0
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_suite import BACKEND_ENV  # noqa: E402
+from load_test import BACKEND_DIR, drive, free_port, start_backend, start_mock, stop  # noqa: E402
+
+
+def capture(recording, requests, mock_args):
+    """
+    Record `requests` exchanges per provider from the mock into `recording`
+    """
+    mock_port, backend_port = free_port(), free_port()
+    processes = [start_mock(mock_port, mock_args)]
+    env = dict(BACKEND_ENV, PROVIDER_RECORDING="record", PROVIDER_RECORDING_FILE=recording)
+    try:
+        processes.append(start_backend("main", backend_port, f"http://127.0.0.1:{mock_port}", env))
+        url = f"http://127.0.0.1:{backend_port}/chat"
+        asyncio.run(drive(url, 4, requests, use_groq=False))
+        asyncio.run(drive(url, 4, requests, use_groq=True))
+    finally:
+        stop(processes)
+
+
+def replay(recording, scale, concurrency, requests, use_groq):
+    port = free_port()
+    env = dict(
+        BACKEND_ENV, PROVIDER_RECORDING="replay", PROVIDER_RECORDING_FILE=recording,
+        PROVIDER_REPLAY_LATENCY_SCALE=str(scale)
+    )
+    # The replay transport never connects, so the upstream is never contacted
+    process = start_backend("main", port, "http://replay.invalid", env)
+    try:
+        return asyncio.run(drive(f"http://127.0.0.1:{port}/chat", concurrency, requests, use_groq))
+    finally:
+        stop([process])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recording", default=os.path.join(BACKEND_DIR, "recordings", "providers.jsonl.gz"))
+    parser.add_argument("--capture", action="store_true", help="Record from the mock providers first")
+    parser.add_argument("--capture-requests", type=int, default=50)
+    parser.add_argument("--mock-latency", default="lognormal:0.8,0.4", help="Mock latency spec used by --capture")
+    parser.add_argument("--scales", default="1,0.5,0", help="Comma-separated latency multipliers")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--use-groq", action="store_true", help="Send customize-plan requests")
+    args = parser.parse_args()
+
+    recording = os.path.abspath(args.recording)
+    if args.capture:
+        if os.path.exists(recording):
+            os.remove(recording)
+        capture(recording, args.capture_requests, ["--latency", args.mock_latency, "--seed", "7"])
+    if not os.path.exists(recording):
+        parser.error(f"No recording at {recording}; record one or pass --capture")
+
+    results = []
+    for scale in (float(value) for value in args.scales.split(",")):
+        runs = [replay(recording, scale, args.concurrency, args.requests, args.use_groq) for _ in range(args.repeat)]
+        results.append({"latency_scale": scale, "runs": runs})
+    print(json.dumps({"recording": recording, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Semantic cache lookup benchmark
+
+Fills a SemanticCache with synthetic travel questions and measures embedding,
+top-k search and full lookup latency:
+
+    python benchmarks/semantic_cache_benchmark.py --entries 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_cache import SemanticCache  # noqa: E402
+
+PHRASINGS = [
+    "what to do in {place}",
+    "{place} things to do",
+    "best hotels in {place} for {n} nights",
+    "plan a {n} day trip to {place}",
+    "weather in {place} in month {n}",
+    "how do I get from the airport to {place} center",
+    "is it safe to travel to {place} right now",
+    "cheap food to try in {place} area {n}",
+]
+
+
+def synthetic_messages(count, rng):
+    places = [f"city{i}" for i in range(max(count // 20, 1))]
+    return [
+        rng.choice(PHRASINGS).format(place=rng.choice(places), n=rng.randint(1, 14))
+        for _ in range(count)
+    ]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cache = SemanticCache(capacity=args.entries)
+    messages = synthetic_messages(args.entries, rng)
+
+    start = time.perf_counter()
+    for i, message in enumerate(messages):
+        cache.store("regular", message, {"response": f"answer {i}", "model_name": "bench"})
+    fill_s = time.perf_counter() - start
+
+    queries = [rng.choice(messages) for _ in range(args.queries)]
+    embed_times, search_times, lookup_times = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        vector = cache.embedder.embed(query)
+        embed_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        cache.index.search(vector)
+        search_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        cache.lookup("regular", query)
+        lookup_times.append(time.perf_counter() - start)
+
+    print(json.dumps({
+        "entries": cache.index.size,
+        "dim": cache.embedder.dim,
+        "index_mb": round(cache.index.vectors.nbytes / 2 ** 20, 1),
+        "fill_s": round(fill_s, 2),
+        "embed": percentiles(embed_times),
+        "search_top8": percentiles(search_times),
+        "lookup": percentiles(lookup_times),
+        "hit_ratio": cache.stats()["hit_ratio"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
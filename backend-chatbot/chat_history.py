@@ -0,0 +1,137 @@
+"""
+Token-budgeted conversation history for the chat templates.
+
+The most recent messages are kept verbatim; everything older is folded into a
+short extractive summary. The summary of every folded prefix is cached, keyed
+by a rolling hash of the messages in it, so each request only summarizes the
+messages that were folded since the previous turn. Together the summary and
+the recent messages never exceed HISTORY_TOKEN_BUDGET tokens, however long the
+conversation gets.
+"""
+import hashlib
+import os
+import re
+from collections import OrderedDict
+
+from token_counter import count_tokens, truncate_tokens
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "800"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "250"))
+HISTORY_RECENT_MESSAGES = int(os.getenv("HISTORY_RECENT_MESSAGES", "4"))
+# Tokens kept from each folded message in the summary
+SUMMARY_LINE_TOKENS = int(os.getenv("HISTORY_SUMMARY_LINE_TOKENS", "30"))
+SUMMARY_CACHE_SIZE = int(os.getenv("HISTORY_SUMMARY_CACHE_SIZE", "5000"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+_LIST_MARKER = re.compile(r"^(\d+[.)]|[-*#•⚠️\s])+")
+# Boilerplate every answer starts with; useless in a summary
+_BOILERPLATE = ("crisis alert", "no current crisis situations")
+_HEADERS = ("Conversation so far:", "Summary of earlier messages:", "Most recent messages:")
+
+
+def _role(sender):
+    return "User" if sender == "user" else "Assistant"
+
+
+def _gist(text):
+    """
+    First informative sentence of a message, capped at SUMMARY_LINE_TOKENS
+    """
+    for line in text.splitlines():
+        line = _LIST_MARKER.sub("", line).strip()
+        if line and not any(marker in line.lower() for marker in _BOILERPLATE):
+            sentence = _SENTENCE_END.split(line, maxsplit=1)[0]
+            return truncate_tokens(sentence, SUMMARY_LINE_TOKENS)
+    return ""
+
+
+class HistorySummarizer:
+    """
+    Renders chat history into a bounded block of text for the prompt
+    """
+
+    def __init__(self):
+        self._summaries = OrderedDict()  # prefix hash -> summary lines
+        self.summary_cache_hits = 0
+
+    def _fold(self, lines, messages):
+        lines = list(lines)
+        for msg in messages:
+            gist = _gist(msg.text)
+            if gist:
+                lines.append(f"- {_role(msg.sender)}: {gist}")
+        # Keep the newest lines that fit; the oldest context matters least
+        kept, used = [], 0
+        for line in reversed(lines):
+            used += count_tokens(line)
+            if used > HISTORY_SUMMARY_TOKENS:
+                break
+            kept.append(line)
+        kept.reverse()
+        return kept
+
+    def summarize(self, messages):
+        """
+        Summary lines for `messages`, reusing the longest cached prefix
+        """
+        prefix_hashes = []
+        digest = b""
+        for msg in messages:
+            digest = hashlib.sha1(digest + msg.sender.encode() + b"\x1f" + msg.text.encode("utf-8")).digest()
+            prefix_hashes.append(digest)
+
+        start, lines = 0, []
+        for i in range(len(prefix_hashes) - 1, -1, -1):
+            cached = self._summaries.get(prefix_hashes[i])
+            if cached is not None:
+                self._summaries.move_to_end(prefix_hashes[i])
+                self.summary_cache_hits += 1
+                start, lines = i + 1, cached
+                break
+
+        if start < len(messages):
+            lines = self._fold(lines, messages[start:])
+            self._summaries[prefix_hashes[-1]] = lines
+            if len(self._summaries) > SUMMARY_CACHE_SIZE:
+                self._summaries.popitem(last=False)
+        return lines
+
+    def render(self, chat_history) -> str:
+        """
+        History block for the prompt, or "" when there is no history
+
+        Args:
+            chat_history: MessageItem list, oldest first
+        """
+        messages = list(chat_history or [])
+        if not messages:
+            return ""
+
+        # Newest messages first, as many as fit in the verbatim budget
+        recent_budget = HISTORY_TOKEN_BUDGET - HISTORY_SUMMARY_TOKENS - count_tokens(" ".join(_HEADERS))
+        recent = []
+        for msg in reversed(messages[-HISTORY_RECENT_MESSAGES:]):
+            line = f"{_role(msg.sender)}: {msg.text}"
+            cost = count_tokens(line)
+            if cost > recent_budget:
+                if not recent:
+                    # Always keep the last message, even if it has to be cut
+                    recent.append(truncate_tokens(line, recent_budget))
+                break
+            recent.append(line)
+            recent_budget -= cost
+        recent.reverse()
+
+        folded = messages[:len(messages) - len(recent)]
+        summary = self.summarize(folded) if folded else []
+
+        parts = [_HEADERS[0]]
+        if summary:
+            parts.append(_HEADERS[1])
+            parts.extend(summary)
+            parts.append(_HEADERS[2])
+        parts.extend(recent)
+        return "\n".join(parts) + "\n"
+
+
+history_summarizer = HistorySummarizer()
@@ -0,0 +1,129 @@
+"""
+Per-provider circuit breakers.
+
+A breaker opens after CIRCUIT_FAILURE_THRESHOLD consecutive failures or when
+the error rate over the last CIRCUIT_WINDOW calls reaches
+CIRCUIT_ERROR_RATE. While open, calls to the provider fail immediately
+instead of costing a round trip. Billing and auth failures (401/402/403) open
+the breaker straight away with a much longer cool-down, since they will not
+fix themselves in seconds; that acts as a negative cache for them. After the
+cool-down the breaker goes half-open and lets a few probe requests through:
+a successful probe closes it, a failed one opens it again.
+"""
+import os
+import time
+from collections import deque
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_ERROR_RATE = float(os.getenv("CIRCUIT_ERROR_RATE", "0.5"))
+CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_TRANSIENT_COOLDOWN = float(os.getenv("CIRCUIT_TRANSIENT_COOLDOWN", "30"))
+CIRCUIT_AUTH_COOLDOWN = float(os.getenv("CIRCUIT_AUTH_COOLDOWN", "600"))
+CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+AUTH_STATUS = {401, 402, 403}
+
+
+def is_provider_failure(status_code: Optional[int]) -> bool:
+    """
+    Whether a failed call says something about the provider's health
+
+    Transport errors (no status), 5xx, 408 and 429 do; other 4xx are caused
+    by the request and are ignored.
+    """
+    return status_code is None or status_code >= 500 or status_code in (408, 429) or status_code in AUTH_STATUS
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.outcomes = deque(maxlen=CIRCUIT_WINDOW)  # True for success
+        self.open_until = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call may go out now; every allowed call must be followed by
+        record_success, record_failure or release
+        """
+        if self.state == OPEN:
+            if time.monotonic() < self.open_until:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+
+        if self.state == HALF_OPEN:
+            if self.probes_in_flight >= CIRCUIT_HALF_OPEN_PROBES:
+                self.rejected += 1
+                return False
+            self.probes_in_flight += 1
+        return True
+
+    def release(self):
+        """
+        Give back a call slot without an outcome (cancelled or request error)
+        """
+        if self.state == HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def record_success(self):
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self.outcomes.clear()
+        self.consecutive_failures = 0
+        self.outcomes.append(True)
+
+    def record_failure(self, status_code: Optional[int] = None, error: Optional[str] = None):
+        if not is_provider_failure(status_code):
+            self.release()
+            return
+
+        self.last_error = f"{status_code}: {error}" if status_code else error
+        self.consecutive_failures += 1
+        self.outcomes.append(False)
+
+        if status_code in AUTH_STATUS:
+            self._trip(CIRCUIT_AUTH_COOLDOWN)
+        elif self.state == HALF_OPEN:
+            self._trip(CIRCUIT_TRANSIENT_COOLDOWN)
+        elif self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD or (
+            len(self.outcomes) >= CIRCUIT_MIN_CALLS and self.error_rate() >= CIRCUIT_ERROR_RATE
+        ):
+            self._trip(CIRCUIT_TRANSIENT_COOLDOWN)
+
+    def _trip(self, cooldown: float):
+        self.state = OPEN
+        self.open_until = time.monotonic() + cooldown
+        self.probes_in_flight = 0
+        self.times_opened += 1
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def retry_in(self) -> float:
+        return max(self.open_until - time.monotonic(), 0.0) if self.state == OPEN else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "error_rate": round(self.error_rate(), 3),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_s": round(self.retry_in(), 1),
+            "last_error": self.last_error
+        }
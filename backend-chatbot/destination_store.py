@@ -0,0 +1,227 @@
+"""
+Indexed destination catalog with entity extraction for the rule-based responders.
+
+Destinations are loaded once from two sources and merged by name:
+  - the frontend's catalog in data/destinations.ts (attractions with details)
+  - the built-in list in simple_main.py (attractions, hotels, weather)
+
+Every name, alias and attraction goes into one inverted index (a
+PhraseIndex token trie, see intent_engine.py) pointing at destination ids,
+weighted by field and by phrase length, so a two-word name beats a place
+named after one of its words. `extract` tokenizes a message once and walks
+that index, so finding the destinations a message talks about costs the
+same for five places as for tens of thousands.
+"""
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional
+
+from intent_engine import PhraseIndex, tokenize
+
+logger = logging.getLogger("yatra-sevak")
+
+DESTINATIONS_CATALOG = os.getenv(
+    "DESTINATIONS_CATALOG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "destinations.ts")
+)
+
+NAME_WEIGHT = 3.0
+ALIAS_WEIGHT = 2.5
+ATTRACTION_WEIGHT = 2.0
+
+# Other ways travelers name the built-in destinations
+ALIASES = {
+    "New York": ["nyc", "new york city", "manhattan", "big apple"],
+    "Paris": ["city of light"],
+    "London": ["ldn"],
+    "Dubai": ["dxb"],
+    "Bali": ["denpasar", "ubud", "seminyak"],
+}
+
+# Fill itineraries for destinations with few known attractions
+ITINERARY_FILLERS = ["the old town", "the central market", "the waterfront", "a city park"]
+
+# Tokens of a JS object literal: strings, comments, identifiers, anything else
+_JS_TOKEN = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|//[^\n]*|/\*.*?\*/|[A-Za-z_$][\w$]*|\s+|.',
+    re.S
+)
+
+
+def parse_ts_object(source: str, name: str):
+    """
+    Parse the object literal assigned to `name` in a TypeScript module
+
+    Handles what a data file uses: quoted or bare keys, single- or
+    double-quoted strings, numbers, booleans, comments and trailing commas.
+
+    Raises:
+        ValueError: `name` is not assigned an object literal
+    """
+    match = re.search(rf"\b{re.escape(name)}\b[^=]*=\s*", source)
+    if match is None:
+        raise ValueError(f"No assignment to {name}")
+    tokens = []
+    depth = 0
+    for token in _JS_TOKEN.finditer(source, match.end()):
+        text = token.group()
+        if text.startswith(("//", "/*")) or text.isspace():
+            continue
+        if text.startswith("'"):
+            text = json.dumps(text[1:-1].replace("\\'", "'"))
+        elif text[0].isalpha() or text[0] in "_$":
+            if text not in ("true", "false", "null"):
+                # A bare key; the next token must be ':'
+                text = json.dumps(text)
+        elif text in "{[":
+            depth += 1
+        elif text in "}]":
+            depth -= 1
+            if tokens and tokens[-1] == ",":
+                tokens.pop()
+        tokens.append(text)
+        if depth == 0:
+            break
+    return json.loads("".join(tokens))
+
+
+class Destination:
+    __slots__ = ("id", "name", "aliases", "attractions", "attraction_details", "hotels", "weather")
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+        self.aliases: List[str] = []
+        self.attractions: List[str] = []
+        self.attraction_details: Dict[str, dict] = {}
+        self.hotels: List[str] = []
+        self.weather: Optional[str] = None
+
+    def itinerary_stops(self, count: int) -> List[str]:
+        """
+        `count` stops for an itinerary: known attractions first, with visit
+        times from the catalog, then generic activities
+        """
+        stops = []
+        for name in self.attractions[:count]:
+            duration = self.attraction_details[name].get("duration")
+            stops.append(f"{name} ({duration})" if duration else name)
+        return stops + ITINERARY_FILLERS[:count - len(stops)]
+
+
+class DestinationStore:
+    """
+    Destinations plus an inverted index from names, aliases and attractions to them
+    """
+
+    def __init__(self):
+        self.destinations: List[Destination] = []
+        self._by_name: Dict[str, Destination] = {}
+        self.index = PhraseIndex()
+
+    def _index(self, phrase: str, destination: Destination, weight: float):
+        # Longer phrases are more specific, so every token counts
+        self.index.add(phrase, destination.id, weight * len(tokenize(phrase)))
+
+    def _get_or_create(self, name: str) -> Destination:
+        key = name.lower()
+        destination = self._by_name.get(key)
+        if destination is None:
+            destination = Destination(len(self.destinations), name)
+            self.destinations.append(destination)
+            self._by_name[key] = destination
+            self._index(name, destination, NAME_WEIGHT)
+        return destination
+
+    def add(self, name: str, attractions: Iterable = (), hotels: Iterable[str] = (), weather: str = None,
+            aliases: Iterable[str] = ()) -> Destination:
+        """
+        Add a destination, or merge into the one with the same name
+
+        Args:
+            attractions: Attraction names, or dicts with a "name" and more details
+        """
+        destination = self._get_or_create(name)
+        for alias in aliases:
+            if alias not in destination.aliases:
+                destination.aliases.append(alias)
+                self._index(alias, destination, ALIAS_WEIGHT)
+        for attraction in attractions:
+            details = attraction if isinstance(attraction, dict) else {"name": attraction}
+            if details["name"] not in destination.attraction_details:
+                destination.attractions.append(details["name"])
+                self._index(details["name"], destination, ATTRACTION_WEIGHT)
+            destination.attraction_details[details["name"]] = {
+                **destination.attraction_details.get(details["name"], {}), **details
+            }
+        for hotel in hotels:
+            if hotel not in destination.hotels:
+                destination.hotels.append(hotel)
+        if weather:
+            destination.weather = weather
+        return destination
+
+    def get(self, name: str) -> Optional[Destination]:
+        return self._by_name.get(name.lower())
+
+    def extract(self, text: str, limit: int = 3) -> List[Destination]:
+        """
+        Destinations mentioned in `text`, best match first; ties keep the order of mention
+        """
+        scores = self.index.scan(text)
+        ranked = sorted(scores, key=lambda id: -scores[id])[:limit]
+        return [self.destinations[id] for id in ranked]
+
+    def resolve(self, message: str, chat_history: Iterable = ()) -> Optional[Destination]:
+        """
+        The destination a message is about, falling back to the latest one named
+        in the conversation ("what about hotels there?")
+        """
+        found = self.extract(message, limit=1)
+        if found:
+            return found[0]
+        for item in reversed(list(chat_history or [])):
+            found = self.extract(item.text, limit=1)
+            if found:
+                return found[0]
+        return None
+
+
+def load_catalog(store: DestinationStore, path: str = DESTINATIONS_CATALOG):
+    """
+    Merge the frontend catalog (data/destinations.ts) into `store`
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            catalog = parse_ts_object(f.read(), "destinationsData")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Destination catalog {path} not loaded: {e}")
+        return
+    for key, entry in catalog.items():
+        # One malformed entry must not keep the responders from starting
+        try:
+            name = entry.get("name") or key.replace("_", " ").replace("-", " ").title()
+            store.add(name, entry.get("attractions", []), entry.get("hotels", []), entry.get("weather"),
+                      entry.get("aliases", []))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Destination {key!r} in {path} skipped: {e}")
+
+
+def build_store(builtin: List[dict], catalog_path: str = DESTINATIONS_CATALOG) -> DestinationStore:
+    """
+    A store with the built-in destinations of a responder merged with the catalog
+
+    Args:
+        builtin: Dicts with name, attractions, hotels and weather, as in simple_main.py
+    """
+    store = DestinationStore()
+    for entry in builtin:
+        store.add(entry["name"], entry["attractions"], entry["hotels"], entry["weather"],
+                  ALIASES.get(entry["name"], []))
+    load_catalog(store, catalog_path)
+    for name, aliases in ALIASES.items():
+        if store.get(name) is not None:
+            store.add(name, aliases=aliases)
+    return store
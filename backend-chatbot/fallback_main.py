@@ -1,13 +1,19 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
+from types import MappingProxyType
+import asyncio
+import math
 import os
+import time
 from dotenv import load_dotenv
 from langchain_community.llms import HuggingFaceEndpoint
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from token_counter import count_tokens
+
 # Load environment variables
 load_dotenv()
 
@@ -21,7 +27,8 @@ repo_id = "mistralai/Mixtral-8x7B-Instruct-v0.1"
 task = "text-generation"
 
 # Add these parameters to control response length
-RESPONSE_PARAMS = {
+# Read-only: requests that need different values pass overrides to chain_pool.get
+RESPONSE_PARAMS = MappingProxyType({
     "max_new_tokens": 8000,  # Significantly increased for longer responses
     "temperature": 0.9,      # Slightly increased for more creative responses
     "top_p": 0.99,          # Increased for more diverse outputs
@@ -30,7 +37,22 @@ RESPONSE_PARAMS = {
     "length_penalty": 2.0,   # Added to favor longer responses
     "min_length": 200,       # Added minimum length requirement
     "num_beams": 4          # Added for better response quality
-}
+})
+
+# Answers shorter than this are extended with a continuation instead of regenerated
+MIN_RESPONSE_WORDS = 200
+# Most new tokens spent extending one answer, over at most EXTENSION_ROUNDS calls
+EXTENSION_MAX_TOKENS = int(os.getenv("FALLBACK_EXTENSION_MAX_TOKENS", "1024"))
+EXTENSION_ROUNDS = int(os.getenv("FALLBACK_EXTENSION_ROUNDS", "2"))
+# Continuation budgets are multiples of this, so only a few chains are ever
+# built; the last round gets the whole steps left of EXTENSION_MAX_TOKENS
+EXTENSION_TOKEN_STEP = 128
+# Every continuation budget a request can ask for; their chains are built at startup
+EXTENSION_STEPS = tuple(range(EXTENSION_TOKEN_STEP, EXTENSION_MAX_TOKENS + 1, EXTENSION_TOKEN_STEP))
+TOKENS_PER_WORD = 1.4
+
+# Send one tiny generation at startup, so the model is loaded before the first user request
+WARMUP_REQUEST = os.getenv("FALLBACK_WARMUP_REQUEST", "false").lower() == "true"
 
 # Define the template for the chatbot
 template = """
@@ -71,6 +93,112 @@ User question:
 
 prompt = ChatPromptTemplate.from_template(template)
 
+# Sends the short answer back so the model only writes the missing part
+continuation_prompt = ChatPromptTemplate.from_template(template + """
+Your answer so far:
+{partial_answer}
+
+Continue the answer from exactly where it stops. Do not repeat anything that is already written and do not start over.
+""")
+
+PROMPTS = {"answer": prompt, "continue": continuation_prompt}
+
+def build_llm(params):
+    """
+    A HuggingFaceEndpoint generating with `params`
+
+    Parameters the endpoint declares as fields (max_new_tokens, temperature,
+    ...) must be passed as such; it rejects them inside model_kwargs. The
+    rest are sent through model_kwargs.
+    """
+    fields = HuggingFaceEndpoint.__fields__
+    return HuggingFaceEndpoint(
+        huggingfacehub_api_token=api_token,
+        repo_id=repo_id,
+        task=task,
+        **{name: value for name, value in params.items() if name in fields},
+        model_kwargs={name: value for name, value in params.items() if name not in fields}
+    )
+
+class ChainPool:
+    """
+    Long-lived `prompt | llm | StrOutputParser()` chains, one per prompt and parameter set
+
+    Building a HuggingFaceEndpoint validates the token and creates its
+    inference clients, so chains are built once and shared by every request.
+    A chain holds no per-request state, so concurrent requests can use the
+    same one. Parameters never change after construction: a request that
+    needs other values gets the chain built for those overrides. `warm`
+    builds every parameter set in CHAIN_PRESETS at startup; anything else is
+    built on first use in a worker thread, off the event loop.
+    """
+
+    def __init__(self, base_params):
+        self.base_params = MappingProxyType(dict(base_params))
+        self._chains: Dict[frozenset, object] = {}
+        self.build_seconds: Dict[frozenset, float] = {}
+
+    def _build(self, key: frozenset, template_name: str, overrides: dict):
+        started = time.perf_counter()
+        chain = PROMPTS[template_name] | build_llm({**self.base_params, **overrides}) | StrOutputParser()
+        # Two requests may miss at once; the first chain built wins
+        self.build_seconds.setdefault(key, time.perf_counter() - started)
+        return self._chains.setdefault(key, chain)
+
+    async def get(self, template_name: str = "answer", **overrides):
+        """
+        The chain for a prompt in PROMPTS and RESPONSE_PARAMS with `overrides` applied, built on first use
+        """
+        key = frozenset(overrides.items() | {("template", template_name)})
+        chain = self._chains.get(key)
+        if chain is None:
+            # Building validates the token over the network, so keep it off the event loop
+            chain = await asyncio.to_thread(self._build, key, template_name, overrides)
+        return chain
+
+    async def warm(self, presets, send_request: bool = False):
+        """
+        Build the chain for every (prompt, overrides) pair in `presets`, and
+        optionally load the model with a tiny generation
+
+        Failures are only logged: a bad token or an unreachable hub must not
+        stop the service from starting. Requests then build the chain on
+        first use and report the error like any other generation failure.
+        """
+        results = await asyncio.gather(
+            *(self.get(template_name, **overrides) for template_name, overrides in presets),
+            return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            print(f"Chain warm-up build failed for {len(failures)} of {len(results)} chains: {str(failures[0])}")
+            return
+        if send_request:
+            try:
+                chain = await self.get(max_new_tokens=1)
+                await chain.ainvoke({"chat_history": "", "user_question": "Hello"})
+            except Exception as e:
+                print(f"Chain warm-up request failed: {str(e)}")
+
+    def stats(self):
+        return {
+            "chains": len(self._chains),
+            "build_ms": {
+                ",".join(f"{name}={value}" for name, value in sorted(key, key=str)): round(seconds * 1000, 1)
+                for key, seconds in self.build_seconds.items()
+            }
+        }
+
+chain_pool = ChainPool(RESPONSE_PARAMS)
+
+# Every parameter set requests use: the answer chain and one continuation chain per budget
+CHAIN_PRESETS = [("answer", {})] + [("continue", {"max_new_tokens": step}) for step in EXTENSION_STEPS]
+if WARMUP_REQUEST:
+    CHAIN_PRESETS.append(("answer", {"max_new_tokens": 1}))
+
+# Answers extended by continuation, reported in /health
+extension_stats = {"requests": 0, "extended": 0, "continuations": 0, "extension_tokens": 0, "still_short": 0}
+
 app = FastAPI(title="Smart.AI Travel API", description="Travel chatbot API using Hugging Face models")
 
 # CORS configuration to allow requests from your Next.js frontend
@@ -94,50 +222,83 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
 
-# Generate a response based on the user's message
-def generate_response(message: str, chat_history: List[MessageItem] = []) -> str:
-    try:
-        # Format chat history for the prompt
-        formatted_history = ""
-        for msg in chat_history:
-            role = "User" if msg.sender == "user" else "AI"
-            formatted_history += f"{role}: {msg.text}\n"
-
-        # Initialize the Hugging Face Endpoint with parameters
-        llm = HuggingFaceEndpoint(
-            huggingfacehub_api_token=api_token,
-            repo_id=repo_id,
-            task=task,
-            model_kwargs=RESPONSE_PARAMS  # Add the parameters here
-        )
+def clean_response(response: str) -> str:
+    return response.replace("AI response:", "").replace("chat response:", "").replace("bot response:", "").strip()
+
+async def extend_response(inputs: dict, response: str):
+    """
+    Lengthen a short answer by asking only for the missing part
+
+    The partial answer goes back as context and each call is capped at the
+    tokens still needed, so a short answer costs a small continuation
+    instead of a full regeneration. At most EXTENSION_MAX_TOKENS new tokens
+    are spent over EXTENSION_ROUNDS calls.
+
+    Returns:
+        The extended answer and the number of tokens the continuations generated
+    """
+    granted = 0
+    generated = 0
+    for _ in range(EXTENSION_ROUNDS):
+        missing_words = MIN_RESPONSE_WORDS - len(response.split())
+        # The budget is charged with what the model may generate, not with
+        # what came back, so the cap holds whatever the tokenizer. Rounded
+        # down to a step, so the chain for it is one of EXTENSION_STEPS
+        remaining = (EXTENSION_MAX_TOKENS - granted) // EXTENSION_TOKEN_STEP * EXTENSION_TOKEN_STEP
+        if missing_words <= 0 or remaining <= 0:
+            break
+        # Headroom for the model not stopping exactly where asked
+        wanted = math.ceil(missing_words * TOKENS_PER_WORD * 1.5 / EXTENSION_TOKEN_STEP) * EXTENSION_TOKEN_STEP
+        max_new_tokens = min(wanted, remaining)
+        granted += max_new_tokens
+        chain = await chain_pool.get("continue", max_new_tokens=max_new_tokens)
+        continuation = clean_response(await chain.ainvoke(dict(inputs, partial_answer=response)))
+        extension_stats["continuations"] += 1
+        if not continuation:
+            break
+        generated += count_tokens(continuation)
+        response = f"{response} {continuation}"
+    return response, generated
+
+async def generate_answer(message: str, chat_history: List[MessageItem] = []):
+    """
+    Generate an answer, extending it if it is short
+
+    Returns:
+        The answer and the number of tokens generated for it
+    """
+    # Format chat history for the prompt
+    formatted_history = ""
+    for msg in chat_history:
+        role = "User" if msg.sender == "user" else "AI"
+        formatted_history += f"{role}: {msg.text}\n"
+
+    inputs = {
+        "chat_history": formatted_history,
+        "user_question": message,
+    }
+
+    # Get response from the model, without blocking the event loop
+    chain = await chain_pool.get()
+    response = clean_response(await chain.ainvoke(inputs))
+    generated = count_tokens(response)
+    extension_stats["requests"] += 1
+
+    # If response is too short, continue it rather than starting over
+    if len(response.split()) < MIN_RESPONSE_WORDS:
+        response, extension_tokens = await extend_response(inputs, response)
+        generated += extension_tokens
+        extension_stats["extended"] += 1
+        extension_stats["extension_tokens"] += extension_tokens
+        if len(response.split()) < MIN_RESPONSE_WORDS:
+            extension_stats["still_short"] += 1
 
-        chain = prompt | llm | StrOutputParser()
-
-        # Get response from the model
-        response = chain.invoke({
-            "chat_history": formatted_history,
-            "user_question": message,
-        })
-
-        # Clean up response and ensure minimum length
-        response = response.replace("AI response:", "").replace("chat response:", "").replace("bot response:", "").strip()
-
-        # If response is too short, try to generate again with even higher max_tokens
-        if len(response.split()) < 200:  # Increased minimum words
-            RESPONSE_PARAMS["max_new_tokens"] = 8000  # Even more tokens for retry
-            llm = HuggingFaceEndpoint(
-                huggingfacehub_api_token=api_token,
-                repo_id=repo_id,
-                task=task,
-                model_kwargs=RESPONSE_PARAMS
-            )
-            chain = prompt | llm | StrOutputParser()
-            response = chain.invoke({
-                "chat_history": formatted_history,
-                "user_question": message,
-            })
-            response = response.replace("AI response:", "").replace("chat response:", "").replace("bot response:", "").strip()
+    return response, generated
 
+# Generate a response based on the user's message
+async def generate_response(message: str, chat_history: List[MessageItem] = []) -> str:
+    try:
+        response, _ = await generate_answer(message, chat_history)
         return response
     except Exception as e:
         print(f"Error generating response: {str(e)}")
@@ -149,17 +310,21 @@ def generate_response(message: str, chat_history: List[MessageItem] = []) -> str
 async def chat_endpoint(request: ChatRequest):
     try:
         # Generate response using our function
-        response = generate_response(request.message, request.chat_history)
+        response = await generate_response(request.message, request.chat_history)
         return {"response": response}
 
     except Exception as e:
         print(f"Error in chat endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("startup")
+async def warm_chain_pool():
+    await chain_pool.warm(CHAIN_PRESETS, WARMUP_REQUEST)
+
 # Add a health check endpoint
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "chain_pool": chain_pool.stats(), "length_extension": extension_stats}
 
 # Add a root endpoint
 @app.get("/")
@@ -0,0 +1,178 @@
+"""
+Fault injection for provider calls.
+
+With FAULT_INJECTION_ENABLED=true every provider client gets a transport
+wrapper that can, per provider and with a given probability:
+
+    latency=S    add S seconds before the request goes out
+    timeout=S    wait S seconds, then fail with a read timeout
+    reset        fail with a connection reset
+    status=CODE  answer with CODE instead of calling the provider
+    truncate     call the provider, then cut the response body in half
+
+Faults sit below the retry policy, so each retry attempt rolls again and a
+fault behaves exactly like the real failure it imitates. Rules come from
+FAULT_INJECTION, `;`-separated, each `provider:fault[=value][@probability]`:
+
+    FAULT_INJECTION="huggingface:status=503;groq:latency=2@0.3;groq:status=429@0.5"
+
+or are replaced at runtime through the /admin/faults endpoint. Latency rules
+add up; of the other rules, the first one that fires decides the outcome.
+Never enable this in production.
+"""
+import asyncio
+import logging
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("yatra-sevak")
+
+FAULT_INJECTION_ENABLED = os.getenv("FAULT_INJECTION_ENABLED", "false").lower() == "true"
+FAULT_KINDS = ("latency", "timeout", "reset", "status", "truncate")
+
+# Bodies the providers send with these errors
+STATUS_BODIES = {
+    503: {"error": "Model is currently loading", "estimated_time": 20.0},
+    429: {"error": {"message": "Rate limit reached, please try again", "code": "rate_limit_exceeded"}},
+    402: {"error": "Payment required"},
+}
+
+
+@dataclass
+class FaultRule:
+    provider: str
+    fault: str
+    value: Optional[float] = None
+    probability: float = 1.0
+
+    def __post_init__(self):
+        if self.fault not in FAULT_KINDS:
+            raise ValueError(f"Unknown fault '{self.fault}', expected one of {', '.join(FAULT_KINDS)}")
+        if self.fault in ("latency", "status") and self.value is None:
+            raise ValueError(f"Fault '{self.fault}' needs a value")
+        if not 0 <= self.probability <= 1:
+            raise ValueError(f"Probability must be between 0 and 1, got {self.probability}")
+
+
+def parse_rules(spec: str) -> List[FaultRule]:
+    """
+    Parse a FAULT_INJECTION string into rules
+
+    Raises:
+        ValueError: A rule is malformed
+    """
+    rules = []
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        provider, _, fault = item.partition(":")
+        fault, _, probability = fault.partition("@")
+        fault, _, value = fault.partition("=")
+        if not provider or not fault:
+            raise ValueError(f"Malformed fault rule '{item}'")
+        rules.append(FaultRule(
+            provider.strip(), fault.strip(),
+            float(value) if value else None,
+            float(probability) if probability else 1.0
+        ))
+    return rules
+
+
+class FaultInjector:
+    """
+    The active rules and how often each kind of fault was injected
+    """
+
+    def __init__(self, rules: List[FaultRule] = ()):
+        self.rules: List[FaultRule] = list(rules)
+        self.injected: Dict[str, Dict[str, int]] = {}
+
+    def set_rules(self, rules: List[FaultRule]):
+        self.rules = list(rules)
+        logger.warning(f"Fault injection rules: {[asdict(rule) for rule in self.rules] or 'none'}")
+
+    def roll(self, provider: str):
+        """
+        Faults firing for one request: (added latency, terminal or truncate rule or None)
+        """
+        latency = 0.0
+        for rule in self.rules:
+            if rule.provider != provider or random.random() >= rule.probability:
+                continue
+            self._count(provider, rule)
+            if rule.fault == "latency":
+                latency += rule.value
+            else:
+                return latency, rule
+        return latency, None
+
+    def _count(self, provider: str, rule: FaultRule):
+        name = f"status_{int(rule.value)}" if rule.fault == "status" else rule.fault
+        counts = self.injected.setdefault(provider, {})
+        counts[name] = counts.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": FAULT_INJECTION_ENABLED,
+            "rules": [asdict(rule) for rule in self.rules],
+            "injected": self.injected
+        }
+
+
+fault_injector = FaultInjector(parse_rules(os.getenv("FAULT_INJECTION", "")) if FAULT_INJECTION_ENABLED else [])
+
+
+class FaultInjectingTransport(httpx.AsyncBaseTransport):
+    """
+    Applies the injector's rules for one provider around the real transport
+    """
+
+    def __init__(self, provider: str, transport: httpx.AsyncBaseTransport, injector: FaultInjector = fault_injector):
+        self.provider = provider
+        self.transport = transport
+        self.injector = injector
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        latency, rule = self.injector.roll(self.provider)
+        if latency:
+            await asyncio.sleep(latency)
+        if rule is None:
+            return await self.transport.handle_async_request(request)
+
+        if rule.fault == "timeout":
+            await asyncio.sleep(rule.value or 0)
+            raise httpx.ReadTimeout("Injected read timeout", request=request)
+        if rule.fault == "reset":
+            raise httpx.ReadError("Injected connection reset by peer", request=request)
+        if rule.fault == "status":
+            status = int(rule.value)
+            headers = {"retry-after": "1"} if status == 429 else {}
+            return httpx.Response(status, headers=headers, json=STATUS_BODIES.get(status, {"error": "Injected fault"}))
+
+        response = await self.transport.handle_async_request(request)
+        # aread decodes gzip/br, so the cut lands in the JSON, not the compressed bytes
+        body = await response.aread()
+        await response.aclose()
+        headers = [(name, value) for name, value in response.headers.items()
+                   if name not in ("content-length", "content-encoding", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=body[:len(body) // 2])
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def fault_transport(provider: str, transport: Optional[httpx.AsyncBaseTransport],
+                    limits: httpx.Limits) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Wrap a provider's transport when fault injection is enabled
+
+    Args:
+        provider: Provider id
+        transport: The transport chosen so far, or None for httpx's default
+        limits: Connection pool limits, used when a default transport must be built
+    """
+    if not FAULT_INJECTION_ENABLED:
+        return transport
+    return FaultInjectingTransport(provider, transport or httpx.AsyncHTTPTransport(limits=limits))
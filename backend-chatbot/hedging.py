@@ -0,0 +1,152 @@
+"""
+Hedged dispatch across model providers.
+
+The preferred provider is called first. The next provider is only started if
+no answer has arrived within a hedge delay derived from the observed p90
+latency of the provider that is currently running, or right away if that
+provider fails. The first successful answer wins and everything still in
+flight is cancelled.
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger("yatra-sevak")
+
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "8"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "30"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+
+ProviderCall = Tuple[str, Callable[[], Awaitable[dict]]]
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful call latencies per provider
+    """
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.window = window
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+
+    def observe(self, provider: str, seconds: float):
+        self._samples[provider].append(seconds)
+
+    def percentile(self, provider: str, q: float):
+        samples = sorted(self._samples.get(provider, ()))
+        if not samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def hedge_delay(self, provider: str) -> float:
+        """
+        How long to wait on `provider` before starting the next one
+
+        Uses the p90 latency once HEDGE_MIN_SAMPLES answers have been seen,
+        clamped to [HEDGE_MIN_DELAY, HEDGE_MAX_DELAY].
+        """
+        if len(self._samples.get(provider, ())) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(self.percentile(provider, 0.9), HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+
+class HedgeStats:
+    """
+    Per-provider hedging counters exposed through /health
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(lambda: {
+            "primary_requests": 0,   # requests where this provider was tried first
+            "hedges_triggered": 0,   # ...and was too slow or failed, so the next one was started
+            "hedge_requests": 0,     # times this provider was started as a hedge
+            "wins": 0,               # answers served by this provider
+            "hedge_wins": 0,         # ...of which it was the hedge
+        })
+
+    def incr(self, provider: str, counter: str):
+        self._counts[provider][counter] += 1
+
+    def snapshot(self) -> Dict[str, dict]:
+        snapshot = {}
+        for provider, counts in self._counts.items():
+            primary = counts["primary_requests"]
+            snapshot[provider] = dict(
+                counts,
+                hedge_rate=round(counts["hedges_triggered"] / primary, 3) if primary else 0.0,
+            )
+        return snapshot
+
+
+latency_tracker = LatencyTracker()
+hedge_stats = HedgeStats()
+
+
+async def hedged_dispatch(calls: List[ProviderCall]) -> List[dict]:
+    """
+    Call providers in order, hedging to the next one when the current one is slow
+
+    Args:
+        calls: (model_id, coroutine factory) pairs in preference order
+
+    Returns:
+        Every result that completed, in completion order. The last entry is the
+        winning answer if any provider succeeded.
+    """
+    loop = asyncio.get_running_loop()
+    remaining = list(calls)
+    running: Dict[asyncio.Task, Tuple[str, float]] = {}
+    results = []
+    primary = remaining[0][0]
+    hedge_stats.incr(primary, "primary_requests")
+
+    def launch(as_hedge):
+        model_id, factory = remaining.pop(0)
+        if as_hedge:
+            hedge_stats.incr(model_id, "hedge_requests")
+            logger.info(f"Hedging to {model_id}")
+        running[asyncio.create_task(factory())] = (model_id, loop.time())
+        return model_id
+
+    current = launch(as_hedge=False)
+    try:
+        while running:
+            delay = latency_tracker.hedge_delay(current) if remaining else None
+            done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                if current == primary:
+                    hedge_stats.incr(primary, "hedges_triggered")
+                current = launch(as_hedge=True)
+                continue
+
+            for task in done:
+                model_id, started = running.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logger.error(f"{model_id} query raised: {e}")
+                    result = {"success": False, "error": str(e), "model": model_id, "model_name": model_id}
+                results.append(result)
+
+                if result["success"]:
+                    latency_tracker.observe(model_id, loop.time() - started)
+                    hedge_stats.incr(model_id, "wins")
+                    if model_id != primary:
+                        hedge_stats.incr(model_id, "hedge_wins")
+                    return results
+
+            # A failure is as good as a timeout: move on without waiting
+            if remaining and not running:
+                if current == primary:
+                    hedge_stats.incr(primary, "hedges_triggered")
+                current = launch(as_hedge=True)
+    finally:
+        for task in running:
+            task.cancel()
+
+    return results
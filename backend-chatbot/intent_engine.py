@@ -0,0 +1,196 @@
+"""
+Compiled keyword intent matching for the rule-based responders.
+
+simple_main.py and simple_server.py used to run a fixed sequence of
+substring checks, so "hi" matched "this" and "shipping", and each new
+keyword added another scan of the message. Messages are now split into
+word tokens once and matched in a single pass against a token trie holding
+every keyword and phrase. Work per message grows with its length and the
+longest phrase, not with the size of the keyword table. Every match adds
+its weight to its intent; the highest score wins, and ties go to the
+intent listed first.
+
+The default table is INTENT_KEYWORDS. Entries from a JSON file of the same
+shape ({"intent": {"keyword or phrase": weight}}) named by
+INTENT_KEYWORDS_FILE are added on top.
+"""
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("yatra-sevak")
+
+# Runs of letters and digits in any script
+_TOKEN = re.compile(r"[^\W_]+")
+
+# intent -> keyword or phrase -> weight, in tie-break order
+INTENT_KEYWORDS: Dict[str, Dict[str, float]] = {
+    # Low weights: "hi, any hotels in Paris?" is a hotel question
+    "greeting": {
+        "hello": 0.5, "hi": 0.5, "hey": 0.5, "namaste": 0.5, "good morning": 0.5, "good evening": 0.5,
+        "introduce": 1.0, "who are you": 1.0,
+    },
+    "flight": {
+        "flight": 1.0, "fly": 1.0, "flying": 1.0, "airline": 1.0, "airfare": 1.0, "plane ticket": 1.5,
+        "airport": 0.5, "book a flight": 2.0,
+    },
+    "hotel": {
+        "hotel": 1.0, "stay": 1.0, "accommodation": 1.0, "room": 1.0, "resort": 1.0, "hostel": 1.0,
+        "where to stay": 2.0, "place to stay": 2.0, "check in": 0.5,
+    },
+    "destination": {
+        "destination": 1.0, "place": 1.0, "country": 1.0, "city": 1.0, "attraction": 1.0,
+        "things to do": 1.5, "sightseeing": 1.0, "where should i go": 1.5,
+    },
+    "itinerary": {
+        "itinerary": 1.5, "plan": 1.0, "planning": 1.0, "schedule": 1.0, "day trip": 1.0, "day by day": 1.5,
+    },
+    "weather": {
+        "weather": 1.5, "temperature": 1.0, "climate": 1.0, "rain": 1.0, "forecast": 1.0,
+        "best time to visit": 1.5,
+    },
+    "tips": {
+        "tip": 1.0, "advice": 1.0, "suggestion": 1.0, "packing": 1.0, "visa": 1.0, "safety": 1.0,
+    },
+}
+
+
+def normalize(token: str) -> str:
+    """
+    Fold simple plurals so "hotels" and "cities" match "hotel" and "city"
+    """
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def fold_accents(text: str) -> str:
+    """
+    Strip diacritics so "Zürich" and "Zurich" give the same tokens
+    """
+    if text.isascii():
+        return text
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return [normalize(token) for token in _TOKEN.findall(fold_accents(text).lower())]
+
+
+class PhraseIndex:
+    """
+    Token trie from keywords and phrases to weighted labels
+
+    `scan` walks the trie once from every token of a message, so its cost
+    depends on the message length and the longest phrase, not on how many
+    phrases are indexed.
+    """
+
+    # Trie nodes are dicts from token to child node; labels live under this key
+    _END = ""
+
+    def __init__(self):
+        self._trie: dict = {}
+        self.max_phrase_tokens = 0
+        self.size = 0
+
+    def add(self, phrase: str, label, weight: float = 1.0) -> bool:
+        """
+        Index `phrase` for `label`; adding it again replaces the weight
+
+        Returns:
+            False when the phrase has no word characters and was skipped
+        """
+        tokens = tokenize(phrase)
+        if not tokens:
+            logger.warning(f"Skipping phrase {phrase!r} for {label!r}: no word characters")
+            return False
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        labels = node.setdefault(self._END, {})
+        if label not in labels:
+            self.size += 1
+        labels[label] = weight
+        self.max_phrase_tokens = max(self.max_phrase_tokens, len(tokens))
+        return True
+
+    def scan(self, text: str) -> Dict[object, float]:
+        """
+        Summed weights per label for every phrase found in `text`
+        """
+        tokens = tokenize(text)
+        totals: Dict[object, float] = {}
+        for start in range(len(tokens)):
+            node = self._trie
+            for token in tokens[start:start + self.max_phrase_tokens]:
+                node = node.get(token)
+                if node is None:
+                    break
+                for label, weight in node.get(self._END, {}).items():
+                    totals[label] = totals.get(label, 0.0) + weight
+        return totals
+
+
+class IntentEngine:
+    """
+    Weighted multi-keyword intent matcher over a PhraseIndex
+
+    Args:
+        keywords: Intent -> keyword or phrase -> weight; the order of the
+            intents breaks ties
+    """
+
+    def __init__(self, keywords: Dict[str, Dict[str, float]] = None):
+        self._index = PhraseIndex()
+        self._order: Dict[str, int] = {}
+        if keywords:
+            self.add_keywords(keywords)
+
+    @property
+    def intents(self) -> List[str]:
+        return list(self._order)
+
+    @property
+    def size(self) -> int:
+        return self._index.size
+
+    def add(self, intent: str, phrase: str, weight: float = 1.0):
+        self._order.setdefault(intent, len(self._order))
+        self._index.add(phrase, intent, weight)
+
+    def add_keywords(self, keywords: Dict[str, Dict[str, float]]):
+        for intent, phrases in keywords.items():
+            for phrase, weight in phrases.items():
+                self.add(intent, phrase, weight)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        Summed weights per intent for every keyword and phrase found in `text`
+        """
+        return self._index.scan(text)
+
+    def match(self, text: str) -> Optional[str]:
+        """
+        The best-scoring intent for `text`, or None when no keyword matches
+        """
+        totals = self.scores(text)
+        if not totals:
+            return None
+        return max(totals, key=lambda intent: (totals[intent], -self._order[intent]))
+
+
+def load_engine(extra_files: Iterable[str] = ()) -> IntentEngine:
+    engine = IntentEngine(INTENT_KEYWORDS)
+    for path in extra_files:
+        with open(path, encoding="utf-8") as f:
+            engine.add_keywords(json.load(f))
+    return engine
+
+
+intent_engine = load_engine(filter(None, [os.getenv("INTENT_KEYWORDS_FILE")]))
@@ -1,16 +1,35 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import os
 from dotenv import load_dotenv
-import requests
-import time
+import httpx
 import asyncio
-import concurrent.futures
+import time
 import json
 import logging
 
+from provider_client import register_client, get_client, close_all_clients
+from provider_recording import replay_available, recording_stats
+from fault_injection import FAULT_INJECTION_ENABLED, FaultRule, fault_injector, parse_rules
+from hedging import hedged_dispatch, latency_tracker, hedge_stats
+from tracing import TracingMiddleware, annotate, span, traced
+from metrics import MetricsMiddleware, observe_provider_call, registry as metrics_registry
+from admission import admission_controller, AdmissionRejected, lane_for
+from rate_limiter import get_rate_limiter, estimate_tokens
+from retry_policy import provider_retry_policy
+from response_cache import response_cache, cache_key
+from semantic_cache import semantic_cache
+from singleflight import chat_singleflight
+from chat_history import history_summarizer
+from circuit_breaker import CircuitBreaker, is_provider_failure
+from model_router import model_router
+from token_counter import count_tokens
+from template_registry import registry as template_registry
+from prompt_rendering import render_prompt, render_mixtral, render_chat_messages, message_tokens
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +42,9 @@ load_dotenv()
 
 app = FastAPI(title="Yatra Sevak.AI API", description="Travel chatbot API using multiple AI models")
 
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -54,158 +76,56 @@ GROQ_HEADERS = {
     "Content-Type": "application/json"
 }
 
+# Pooled async clients, one per provider (see provider_client.py)
+register_client("huggingface", HF_HEADERS)
+register_client("groq", GROQ_HEADERS)
+
 # Model configuration
 MODELS = {
     "huggingface": {
         "name": HF_MODEL_NAME,
-        "enabled": hf_api_token is not None,
+        # Replay mode serves recorded traffic without an API key
+        "enabled": hf_api_token is not None or replay_available("huggingface"),
         "priority": 1  # Lower number means higher priority
     },
     "groq": {
         "name": GROQ_MODEL_NAME,
-        "enabled": groq_api_key is not None,
+        "enabled": groq_api_key is not None or replay_available("groq"),
         "priority": 2
     }
 }
 
-# Chat templates
-# Template for customize-plan mode (when coming from customize-plan page)
-CUSTOMIZE_TEMPLATE = """<s>[INST] You are a helpful travel assistant named Smart.AI Travel.
-Provide comprehensive, detailed travel information for: {user_input}.
-Focus on flights, hotels, destinations, and travel tips.
-
-CRITICAL INSTRUCTION: For any destination mentioned, you MUST FIRST thoroughly check if there are any recent (within the past 5-7 days) disasters, floods, attacks, political unrest, health emergencies, or other crisis situations that might affect travel safety.
-
-Format the crisis information as follows:
-⚠️ CRISIS ALERT ⚠️
-[List any current crisis situations with detailed information about:
-1. The exact nature of the crisis
-2. When it started and current status
-3. Affected areas within the destination
-4. Severity level
-5. Safety recommendations
-6. Impact on travel infrastructure (airports, hotels, transportation)]
-
-If a crisis exists:
-- ONLY provide the crisis information and DO NOT continue with regular travel planning
-- Clearly explain why travel to this destination is not recommended at this time
-- Suggest alternative destinations if appropriate
-
-If no current crisis situations exist, explicitly state "No current crisis situations reported in this area" and then continue with regular travel information.
-
-This crisis information MUST appear at the beginning of your response, before any other travel information.
-
-After addressing any crisis situations (or confirming there are none), provide a comprehensive, detailed response to the user's query with the following information:
-
-1. DESTINATION OVERVIEW (if applicable):
-   - Brief history and cultural significance
-   - Best times to visit with seasonal considerations
-   - Local customs and etiquette travelers should know
-   - Language considerations and useful phrases
-
-2. ACCOMMODATION OPTIONS (if applicable):
-   - Range of options from luxury to budget
-   - Recommended neighborhoods to stay in
-   - Typical amenities and price ranges
-   - Special accommodation types unique to the region
-
-3. TRANSPORTATION DETAILS (if applicable):
-   - Getting to the destination (flight routes, train options)
-   - Getting around locally (public transit, car rentals, etc.)
-   - Transportation passes or money-saving options
-   - Accessibility considerations
-
-4. ACTIVITIES AND ATTRACTIONS (if applicable):
-   - Must-see attractions with visiting tips
-   - Off-the-beaten-path experiences
-   - Cultural events or seasonal activities
-   - Family-friendly options if relevant
-
-5. PRACTICAL TRAVEL TIPS:
-   - Budget considerations and currency information
-   - Safety tips specific to the destination
-   - Packing recommendations
-   - Visa and entry requirements
-   - Local food specialties to try
-
-Provide a thorough, well-organized response that gives the user comprehensive information while being easy to read. Use appropriate formatting to make your response scannable. [/INST]"""
-
-# Template for regular mode (when accessing chatbot directly)
-REGULAR_TEMPLATE = """<s>[INST] You are a helpful travel assistant named Smart.AI Travel.
-Provide comprehensive, detailed travel information for: {user_input}.
-Focus on flights, hotels, destinations, and travel tips.
-
-CRITICAL INSTRUCTION: For any destination mentioned, you MUST FIRST thoroughly check if there are any recent (within the past 5-7 days) disasters, floods, attacks, political unrest, health emergencies, or other crisis situations that might affect travel safety.
-
-Format the crisis information as follows:
-⚠️ CRISIS ALERT ⚠️
-[List any current crisis situations with detailed information about:
-1. The exact nature of the crisis
-2. When it started and current status
-3. Affected areas within the destination
-4. Severity level
-5. Safety recommendations
-6. Impact on travel infrastructure (airports, hotels, transportation)
-7. Root causes of the crisis
-8. Potential timeline for resolution if known]
-
-If a crisis exists:
-- ONLY provide the crisis information and DO NOT continue with regular travel planning
-- Clearly explain why travel to this destination is not recommended at this time
-- Suggest alternative destinations if appropriate
-
-If no current crisis situations exist, explicitly state "No current crisis situations reported in this area" and then continue with regular travel information.
-
-This crisis information MUST appear at the beginning of your response, before any other travel information.
-
-After addressing any crisis situations (or confirming there are none), provide a comprehensive, detailed response to the user's query with the following information where relevant:
-
-1. DESTINATION OVERVIEW (if applicable):
-   - Brief history and cultural significance
-   - Best times to visit with seasonal considerations
-   - Local customs and etiquette travelers should know
-   - Language considerations and useful phrases
-   - Current local events or festivals
-
-2. ACCOMMODATION OPTIONS (if applicable):
-   - Range of options from luxury to budget
-   - Recommended neighborhoods to stay in
-   - Typical amenities and price ranges
-   - Special accommodation types unique to the region
-   - Booking tips and peak season considerations
-
-3. TRANSPORTATION DETAILS (if applicable):
-   - Getting to the destination (flight routes, train options)
-   - Getting around locally (public transit, car rentals, etc.)
-   - Transportation passes or money-saving options
-   - Accessibility considerations
-   - Traffic or transportation quirks to be aware of
-
-4. ACTIVITIES AND ATTRACTIONS (if applicable):
-   - Must-see attractions with visiting tips
-   - Off-the-beaten-path experiences
-   - Cultural events or seasonal activities
-   - Family-friendly options if relevant
-   - Outdoor activities and natural attractions
-   - Shopping and entertainment districts
-
-5. DINING AND CUISINE (if applicable):
-   - Local specialties and must-try dishes
-   - Price ranges for dining options
-   - Food markets and street food safety
-   - Dining etiquette and tipping customs
-   - Dietary restriction considerations
-
-6. PRACTICAL TRAVEL TIPS:
-   - Budget considerations and currency information
-   - Safety tips specific to the destination
-   - Packing recommendations based on climate and activities
-   - Visa and entry requirements
-   - Health considerations and medical facilities
-   - Internet access and communication options
-   - Local laws travelers should be aware of
-
-Provide a thorough, well-organized response that gives the user comprehensive information while being easy to read. Use appropriate formatting to make your response scannable. Make sure your response is directly relevant to what the user asked, but provide additional helpful information they might not have thought to ask about. [/INST]"""
+# One circuit breaker per provider (see circuit_breaker.py)
+circuit_breakers = {model_id: CircuitBreaker(model_id) for model_id in MODELS}
+
+# Prompt tokens sent per provider, reported in /health
+input_token_stats = {model_id: {"requests": 0, "input_tokens": 0} for model_id in MODELS}
+
+# Dispatch strategy for query_all_models:
+# "fanout" calls every enabled provider at once, "hedge" calls them in
+# priority order and only starts the next one when the current one is slow
+DISPATCH_MODE = os.getenv("DISPATCH_MODE", "fanout")
+
+# /chat/batch: most requests per batch, and unique items answered at once
+CHAT_BATCH_MAX_ITEMS = int(os.getenv("CHAT_BATCH_MAX_ITEMS", "100"))
+CHAT_BATCH_PARALLELISM = int(os.getenv("CHAT_BATCH_PARALLELISM", "8"))
+
+# Fan-out settings for query_all_models (seconds)
+FANOUT_DEADLINE = float(os.getenv("FANOUT_DEADLINE", "60"))
+FANOUT_GRACE = float(os.getenv("FANOUT_GRACE", "2"))
+
+# Markers used by score_response to rate answers
+CRISIS_MARKERS = ["CRISIS ALERT", "NO CURRENT CRISIS SITUATIONS"]
+RESPONSE_SECTIONS = [
+    "DESTINATION OVERVIEW",
+    "ACCOMMODATION",
+    "TRANSPORTATION",
+    "ACTIVITIES AND ATTRACTIONS",
+    "PRACTICAL TRAVEL TIPS",
+]
+RESPONSE_TARGET_WORDS = 600
+
+# Chat templates live in prompt_rendering.py
 
 # Request/response models
 class MessageItem(BaseModel):
@@ -217,6 +137,34 @@ class ChatRequest(BaseModel):
     chat_history: Optional[List[MessageItem]] = []
     use_groq: Optional[bool] = False  # New parameter to force using Groq
 
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest]
+
+class ChatBatchItem(BaseModel):
+    status: int
+    response: Optional[str] = None
+    model_used: Optional[str] = None
+    error: Optional[str] = None
+    retry_after: Optional[int] = None
+
+    model_config = {
+        "protected_namespaces": ()
+    }
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatBatchItem]
+    unique_requests: int
+
+class FaultRuleItem(BaseModel):
+    provider: str
+    fault: str
+    value: Optional[float] = None
+    probability: float = 1.0
+
+class FaultConfig(BaseModel):
+    rules: Optional[List[FaultRuleItem]] = None
+    spec: Optional[str] = None  # FAULT_INJECTION syntax, instead of rules
+
 class ChatResponse(BaseModel):
     response: str
     model_used: str
@@ -225,315 +173,416 @@ class ChatResponse(BaseModel):
         "protected_namespaces": ()
     }
 
-def query_huggingface(payload):
+async def call_with_breaker(model_id, model_name, call, input_tokens=None):
     """
-    Query Hugging Face API with retry logic
+    Run a provider query through the provider's circuit breaker
+
+    While the breaker is open the call fails immediately without a round trip.
+    The call also has to get capacity from the provider's rate limiter; when
+    it cannot within RATE_LIMIT_MAX_WAIT it fails with `rate_limited` set so
+    the caller can fail over. Completed calls feed the adaptive router's
+    latency and success stats.
+
+    Args:
+        model_id: Provider id
+        model_name: Model name for results and logs
+        call: Coroutine factory making the request
+        input_tokens: Estimated prompt tokens, for the token bucket
     """
-    max_retries = 3
-    retry_delay = 2
+    breaker = circuit_breakers[model_id]
+    if not breaker.allow_request():
+        logger.info(f"Circuit for {model_id} is {breaker.state}, skipping call")
+        result = {
+            "success": False,
+            "error": f"Circuit open after repeated failures ({breaker.last_error}), retry in {breaker.retry_in():.0f}s",
+            "model": model_id,
+            "model_name": model_name,
+            "status_code": 503,
+            "circuit_open": True
+        }
+        observe_provider_call(model_id, None, result)
+        return result
 
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Attempting Hugging Face API call (attempt {attempt+1}/{max_retries})...")
-            response = requests.post(HF_API_URL, headers=HF_HEADERS, json=payload)
-
-            # Check for payment required error
-            if response.status_code == 402:
-                logger.warning("Hugging Face API returned 402 Payment Required - subscription issue")
-                return {
-                    "success": False,
-                    "error": "Hugging Face API subscription required for this model",
-                    "model": "huggingface",
-                    "model_name": HF_MODEL_NAME,
-                    "status_code": 402
-                }
+    try:
+        allowed = await get_rate_limiter(model_id).acquire(estimate_tokens(input_tokens))
+    except BaseException:
+        breaker.release()
+        raise
+    if not allowed:
+        # Rejected locally, the provider never saw it: no verdict on its health
+        breaker.release()
+        result = {
+            "success": False,
+            "error": f"{model_name} rate limit reached",
+            "model": model_id,
+            "model_name": model_name,
+            "status_code": 429,
+            "rate_limited": True
+        }
+        observe_provider_call(model_id, None, result)
+        return result
 
-            response.raise_for_status()
-            result = response.json()
-            logger.info("Hugging Face API call successful")
-            return {
-                "success": True,
-                "response": result[0]['generated_text'].strip(),
-                "model": "huggingface",
-                "model_name": HF_MODEL_NAME
-            }
-        except requests.exceptions.HTTPError as err:
-            logger.error(f"Hugging Face API HTTP error: {err}")
-            if response.status_code == 503:  # Model loading
-                if attempt < max_retries - 1:
-                    logger.info(f"Model loading, retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                    continue
-            if attempt == max_retries - 1:
-                return {
-                    "success": False,
-                    "error": str(err),
-                    "model": "huggingface",
-                    "model_name": HF_MODEL_NAME,
-                    "status_code": response.status_code
-                }
-            raise
-        except Exception as e:
-            logger.error(f"Hugging Face API error: {e}")
-            if attempt < max_retries - 1:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-                continue
+    started = time.perf_counter()
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        # Lost a fan-out or hedge: no verdict on health, but it was at least this slow
+        breaker.release()
+        model_router.observe_abandoned(model_id, time.perf_counter() - started)
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+
+    elapsed = time.perf_counter() - started
+    observe_provider_call(model_id, elapsed, result)
+    annotate(success=result["success"])
+    if result.get("status_code"):
+        annotate(status_code=result["status_code"])
+    if result["success"] or is_provider_failure(result.get("status_code")):
+        model_router.observe(
+            model_id,
+            elapsed,
+            result["success"],
+            count_tokens(result["response"]) if result["success"] else 0
+        )
+
+    if result["success"]:
+        breaker.record_success()
+        if result.get("input_tokens"):
+            input_token_stats[model_id]["requests"] += 1
+            input_token_stats[model_id]["input_tokens"] += result["input_tokens"]
+            logger.info(f"{model_id} call used {result['input_tokens']} input tokens")
+    else:
+        breaker.record_failure(result.get("status_code"), result.get("error"))
+        if breaker.state != "closed":
+            logger.warning(f"Circuit for {model_id} is now {breaker.state}")
+    return result
+
+@traced("huggingface")
+async def query_huggingface(payload, input_tokens=None):
+    """
+    Query Hugging Face API, guarded by its circuit breaker
+
+    Args:
+        payload: The payload for the Hugging Face API
+        input_tokens: Precomputed prompt size (RenderedPrompt.input_tokens)
+    """
+    return await call_with_breaker(
+        "huggingface", HF_MODEL_NAME, lambda: _query_huggingface(payload, input_tokens), input_tokens
+    )
+
+async def _query_huggingface(payload, input_tokens=None):
+    """
+    Query Hugging Face API with retry logic (see retry_policy.py)
+    """
+    try:
+        response = await provider_retry_policy.execute(
+            "huggingface", lambda: get_client("huggingface").post(HF_API_URL, payload),
+            get_rate_limiter("huggingface"), estimate_tokens(input_tokens)
+        )
+
+        # Check for payment required error
+        if response.status_code == 402:
+            logger.warning("Hugging Face API returned 402 Payment Required - subscription issue")
             return {
                 "success": False,
-                "error": str(e),
+                "error": "Hugging Face API subscription required for this model",
                 "model": "huggingface",
-                "model_name": HF_MODEL_NAME
+                "model_name": HF_MODEL_NAME,
+                "status_code": 402
             }
 
-    return {
-        "success": False,
-        "error": "Failed to get response after multiple retries",
-        "model": "huggingface",
-        "model_name": HF_MODEL_NAME
-    }
+        response.raise_for_status()
+        result = response.json()
+        logger.info("Hugging Face API call successful")
+        return {
+            "success": True,
+            "response": result[0]['generated_text'].strip(),
+            "model": "huggingface",
+            "model_name": HF_MODEL_NAME,
+            "input_tokens": input_tokens or count_tokens(payload["inputs"])
+        }
+    except httpx.HTTPStatusError as err:
+        logger.error(f"Hugging Face API HTTP error: {err}")
+        return {
+            "success": False,
+            "error": str(err),
+            "model": "huggingface",
+            "model_name": HF_MODEL_NAME,
+            "status_code": err.response.status_code
+        }
+    except Exception as e:
+        logger.error(f"Hugging Face API error: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "model": "huggingface",
+            "model_name": HF_MODEL_NAME
+        }
 
-def query_groq(prompt, is_customize=False):
+def build_groq_payload(prompt):
     """
-    Query Groq API with retry logic
-
-    Args:
-        prompt: The prompt to send to the API
-        is_customize: Whether this is a customize-plan query (affects crisis detail level)
-    """
-    max_retries = 3
-    retry_delay = 2
-
-    # Determine which system message to use based on whether this is a customize-plan query
-    system_message = """You are a helpful travel assistant named Smart.AI Travel. Provide comprehensive, detailed travel information.
-
-CRITICAL INSTRUCTION: For any destination mentioned, you MUST FIRST thoroughly check if there are any recent (within the past 5-7 days) disasters, floods, attacks, political unrest, health emergencies, or other crisis situations that might affect travel safety.
-
-Format the crisis information as follows:
-⚠️ CRISIS ALERT ⚠️
-[List any current crisis situations with detailed information about the nature, status, affected areas, severity, safety recommendations, and impact on travel]
-
-If a crisis exists:
-- ONLY provide the crisis information and DO NOT continue with regular travel planning
-- Clearly explain why travel to this destination is not recommended at this time
-- Suggest alternative destinations if appropriate
-
-If no current crisis situations exist, explicitly state "No current crisis situations reported in this area" and then continue with regular travel information.
-
-This crisis information MUST appear at the beginning of your response, before any other travel information.
-
-After addressing any crisis situations (or confirming there are none), provide a comprehensive, detailed response to the user's query with the following information:
-
-1. DESTINATION OVERVIEW (if applicable):
-   - Brief history and cultural significance
-   - Best times to visit with seasonal considerations
-   - Local customs and etiquette travelers should know
-   - Language considerations and useful phrases
-
-2. ACCOMMODATION OPTIONS (if applicable):
-   - Range of options from luxury to budget
-   - Recommended neighborhoods to stay in
-   - Typical amenities and price ranges
-   - Special accommodation types unique to the region
-
-3. TRANSPORTATION DETAILS (if applicable):
-   - Getting to the destination (flight routes, train options)
-   - Getting around locally (public transit, car rentals, etc.)
-   - Transportation passes or money-saving options
-   - Accessibility considerations
-
-4. ACTIVITIES AND ATTRACTIONS (if applicable):
-   - Must-see attractions with visiting tips
-   - Off-the-beaten-path experiences
-   - Cultural events or seasonal activities
-   - Family-friendly options if relevant
-
-5. PRACTICAL TRAVEL TIPS:
-   - Budget considerations and currency information
-   - Safety tips specific to the destination
-   - Packing recommendations
-   - Visa and entry requirements
-   - Local food specialties to try
-
-Provide a thorough, well-organized response that gives the user comprehensive information while being easy to read."""
-
-    # For regular mode (not customize), add more detailed crisis information requirements
-    if not is_customize:
-        system_message = """You are a helpful travel assistant named Smart.AI Travel. Provide comprehensive, detailed travel information.
-
-CRITICAL INSTRUCTION: For any destination mentioned, you MUST FIRST thoroughly check if there are any recent (within the past 5-7 days) disasters, floods, attacks, political unrest, health emergencies, or other crisis situations that might affect travel safety.
-
-Format the crisis information as follows:
-⚠️ CRISIS ALERT ⚠️
-[List any current crisis situations with detailed information about:
-1. The exact nature of the crisis
-2. When it started and current status
-3. Affected areas within the destination
-4. Severity level
-5. Safety recommendations
-6. Impact on travel infrastructure (airports, hotels, transportation)
-7. Root causes of the crisis
-8. Potential timeline for resolution if known]
-
-If a crisis exists:
-- ONLY provide the crisis information and DO NOT continue with regular travel planning
-- Clearly explain why travel to this destination is not recommended at this time
-- Suggest alternative destinations if appropriate
-
-If no current crisis situations exist, explicitly state "No current crisis situations reported in this area" and then continue with regular travel information.
-
-This crisis information MUST appear at the beginning of your response, before any other travel information.
-
-After addressing any crisis situations (or confirming there are none), provide a comprehensive, detailed response to the user's query with the following information where relevant:
-
-1. DESTINATION OVERVIEW (if applicable):
-   - Brief history and cultural significance
-   - Best times to visit with seasonal considerations
-   - Local customs and etiquette travelers should know
-   - Language considerations and useful phrases
-   - Current local events or festivals
-
-2. ACCOMMODATION OPTIONS (if applicable):
-   - Range of options from luxury to budget
-   - Recommended neighborhoods to stay in
-   - Typical amenities and price ranges
-   - Special accommodation types unique to the region
-   - Booking tips and peak season considerations
-
-3. TRANSPORTATION DETAILS (if applicable):
-   - Getting to the destination (flight routes, train options)
-   - Getting around locally (public transit, car rentals, etc.)
-   - Transportation passes or money-saving options
-   - Accessibility considerations
-   - Traffic or transportation quirks to be aware of
-
-4. ACTIVITIES AND ATTRACTIONS (if applicable):
-   - Must-see attractions with visiting tips
-   - Off-the-beaten-path experiences
-   - Cultural events or seasonal activities
-   - Family-friendly options if relevant
-   - Outdoor activities and natural attractions
-   - Shopping and entertainment districts
-
-5. DINING AND CUISINE (if applicable):
-   - Local specialties and must-try dishes
-   - Price ranges for dining options
-   - Food markets and street food safety
-   - Dining etiquette and tipping customs
-   - Dietary restriction considerations
-
-6. PRACTICAL TRAVEL TIPS:
-   - Budget considerations and currency information
-   - Safety tips specific to the destination
-   - Packing recommendations based on climate and activities
-   - Visa and entry requirements
-   - Health considerations and medical facilities
-   - Internet access and communication options
-   - Local laws travelers should be aware of
-
-Provide a thorough, well-organized response that gives the user comprehensive information while being easy to read. Make sure your response is directly relevant to what the user asked, but provide additional helpful information they might not have thought to ask about."""
+    Build the Groq chat-completions payload for a rendered prompt
 
+    The static template prefix goes in the system message and the
+    per-request suffix in the user message (see
+    prompt_rendering.render_chat_messages), so the instructions are sent once
+    and form a stable prefix for the provider's prompt cache.
+    """
     payload = {
         "model": GROQ_MODEL_NAME,
-        "messages": [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": prompt}
-        ],
+        "messages": render_chat_messages(prompt),
         "temperature": 0.7,
         "max_tokens": 2000,  # Significantly increased to accommodate comprehensive responses
         "top_p": 0.9
     }
+    return payload
 
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Attempting Groq API call (attempt {attempt+1}/{max_retries})...")
-            response = requests.post(GROQ_API_URL, headers=GROQ_HEADERS, json=payload)
-
-            # Check for auth errors
-            if response.status_code in [401, 403]:
-                logger.warning(f"Groq API returned {response.status_code} - authentication issue")
-                return {
-                    "success": False,
-                    "error": f"Groq API authentication error: {response.text}",
-                    "model": "groq",
-                    "model_name": f"groq/{GROQ_MODEL_NAME}",
-                    "status_code": response.status_code
-                }
+@traced("groq")
+async def query_groq(prompt):
+    """
+    Query Groq API with retry logic, guarded by its circuit breaker
 
-            response.raise_for_status()
-            response_json = response.json()
-            logger.info("Groq API call successful")
-            return {
-                "success": True,
-                "response": response_json["choices"][0]["message"]["content"],
-                "model": "groq",
-                "model_name": f"groq/{GROQ_MODEL_NAME}"
-            }
-        except requests.exceptions.HTTPError as err:
-            logger.error(f"Groq API HTTP error: {err}")
-            if attempt < max_retries - 1:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-                continue
+    Args:
+        prompt: The rendered prompt (see build_prompt)
+    """
+    return await call_with_breaker(
+        "groq", f"groq/{GROQ_MODEL_NAME}",
+        lambda: _query_groq(build_groq_payload(prompt), prompt.input_tokens), prompt.input_tokens
+    )
+
+async def _query_groq(payload, input_tokens=None):
+    """
+    Query Groq API with retry logic (see retry_policy.py)
+    """
+
+    try:
+        response = await provider_retry_policy.execute(
+            "groq", lambda: get_client("groq").post(GROQ_API_URL, payload),
+            get_rate_limiter("groq"), estimate_tokens(input_tokens)
+        )
+
+        # Check for auth errors
+        if response.status_code in [401, 403]:
+            logger.warning(f"Groq API returned {response.status_code} - authentication issue")
             return {
                 "success": False,
-                "error": str(err),
+                "error": f"Groq API authentication error: {response.text}",
                 "model": "groq",
                 "model_name": f"groq/{GROQ_MODEL_NAME}",
-                "status_code": getattr(response, 'status_code', None)
-            }
-        except Exception as e:
-            logger.error(f"Groq API error: {e}")
-            if attempt < max_retries - 1:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay *= 2
-                continue
-            return {
-                "success": False,
-                "error": str(e),
-                "model": "groq",
-                "model_name": f"groq/{GROQ_MODEL_NAME}"
+                "status_code": response.status_code
             }
 
-    return {
-        "success": False,
-        "error": "Failed to get response from Groq API after multiple retries",
-        "model": "groq",
-        "model_name": f"groq/{GROQ_MODEL_NAME}"
+        response.raise_for_status()
+        response_json = response.json()
+        logger.info("Groq API call successful")
+        return {
+            "success": True,
+            "response": response_json["choices"][0]["message"]["content"],
+            "model": "groq",
+            "model_name": f"groq/{GROQ_MODEL_NAME}",
+            # Groq reports the real prompt size; fall back to our estimate
+            "input_tokens": response_json.get("usage", {}).get("prompt_tokens") or input_tokens or message_tokens(payload["messages"])
+        }
+    except httpx.HTTPStatusError as err:
+        logger.error(f"Groq API HTTP error: {err}")
+        return {
+            "success": False,
+            "error": str(err),
+            "model": "groq",
+            "model_name": f"groq/{GROQ_MODEL_NAME}",
+            "status_code": err.response.status_code
+        }
+    except Exception as e:
+        logger.error(f"Groq API error: {e}")
+        return {
+            "success": False,
+            "error": str(e),
+            "model": "groq",
+            "model_name": f"groq/{GROQ_MODEL_NAME}"
+        }
+
+async def iter_sse_data(response):
+    """
+    Yield the decoded JSON payload of every `data:` line of an SSE response
+    """
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        yield json.loads(data)
+
+async def stream_huggingface(payload, input_tokens=None):
+    """
+    Stream generated text from the Hugging Face API as it is produced
+
+    Raises on HTTP or stream errors; the caller decides whether to fall back.
+    """
+    response = await provider_retry_policy.execute(
+        "huggingface", lambda: get_client("huggingface").post_stream(HF_API_URL, payload),
+        get_rate_limiter("huggingface"), estimate_tokens(input_tokens)
+    )
+    try:
+        if response.is_error:
+            await response.aread()
+            response.raise_for_status()
+        async for chunk in iter_sse_data(response):
+            if "error" in chunk:
+                raise RuntimeError(chunk["error"])
+            token = chunk.get("token") or {}
+            if token.get("text") and not token.get("special"):
+                yield token["text"]
+    finally:
+        await response.aclose()
+
+async def stream_groq(prompt):
+    """
+    Stream generated text from the Groq API as it is produced
+
+    Raises on HTTP or stream errors; the caller decides whether to fall back.
+    """
+    payload = build_groq_payload(prompt)
+    payload["stream"] = True
+
+    response = await provider_retry_policy.execute(
+        "groq", lambda: get_client("groq").post_stream(GROQ_API_URL, payload),
+        get_rate_limiter("groq"), estimate_tokens(prompt.input_tokens)
+    )
+    try:
+        if response.is_error:
+            await response.aread()
+            response.raise_for_status()
+        async for chunk in iter_sse_data(response):
+            content = chunk["choices"][0]["delta"].get("content")
+            if content:
+                yield content
+    finally:
+        await response.aclose()
+
+def dispatch_order(first=None):
+    """
+    Enabled model ids in the adaptive router's order, optionally with `first` moved to the front
+    """
+    enabled = [model_id for model_id, config in MODELS.items() if config["enabled"]]
+    order = model_router.order(enabled, {model_id: MODELS[model_id]["priority"] for model_id in enabled})
+    if first in order:
+        order.remove(first)
+        order.insert(0, first)
+    return order
+
+def provider_calls(prompt, hf_payload, first=None):
+    """
+    Enabled providers as (model_id, coroutine factory) pairs in dispatch order
+
+    Args:
+        prompt: The prompt to send to the API
+        hf_payload: The payload for the Hugging Face API
+        first: Optional model id to put ahead of the priority order
+    """
+    factories = {
+        "huggingface": lambda: query_huggingface(hf_payload, prompt.input_tokens),
+        "groq": lambda: query_groq(prompt),
     }
+    return [(model_id, factories[model_id]) for model_id in dispatch_order(first)]
 
-def query_all_models(prompt, hf_payload, is_customize=False):
+@traced("dispatch")
+async def query_all_models(prompt, hf_payload, first=None):
     """
     Query all enabled models in parallel and return all responses
 
+    Every enabled provider is started at once. Results are collected until
+    FANOUT_DEADLINE expires, or until FANOUT_GRACE seconds after the first
+    successful answer, so a slower provider can still compete on quality
+    without holding the request hostage. Providers still running at that
+    point are cancelled.
+
+    With DISPATCH_MODE=hedge the providers are called in priority order
+    instead, see hedging.hedged_dispatch.
+
     Args:
         prompt: The prompt to send to the API
         hf_payload: The payload for the Hugging Face API
-        is_customize: Whether this is a customize-plan query (affects crisis detail level)
+        first: Optional model id to try ahead of the priority order
     """
+    calls = provider_calls(prompt, hf_payload, first)
+    if not calls:
+        return []
+
+    if DISPATCH_MODE == "hedge":
+        logger.info(f"Hedged dispatch over: {', '.join(model_id for model_id, _ in calls)}")
+        results = await hedged_dispatch(calls)
+        logger.info(f"Got results from {len(results)} models")
+        return results
+
+    logger.info(f"Querying {len(calls)} models concurrently: {', '.join(model_id for model_id, _ in calls)}")
+    tasks = {asyncio.create_task(factory()): model_id for model_id, factory in calls}
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + FANOUT_DEADLINE
     results = []
+    pending = set(tasks)
 
-    # Query Hugging Face if enabled
-    if MODELS["huggingface"]["enabled"]:
-        logger.info("Querying Hugging Face model...")
-        hf_result = query_huggingface(hf_payload)
-        results.append(hf_result)
-        logger.info(f"Hugging Face result success: {hf_result['success']}")
-
-    # Query Groq if enabled
-    if MODELS["groq"]["enabled"]:
-        logger.info("Querying Groq model...")
-        groq_result = query_groq(prompt, is_customize)
-        results.append(groq_result)
-        logger.info(f"Groq result success: {groq_result['success']}")
+    try:
+        while pending:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logger.error(f"{tasks[task]} query raised: {e}")
+                    result = {
+                        "success": False,
+                        "error": str(e),
+                        "model": tasks[task],
+                        "model_name": MODELS[tasks[task]]["name"]
+                    }
+                results.append(result)
+                logger.info(f"{tasks[task]} result success: {result['success']} after {loop.time() - started:.2f}s")
+                if result["success"]:
+                    latency_tracker.observe(tasks[task], loop.time() - started)
+                    deadline = min(deadline, loop.time() + FANOUT_GRACE)
+    finally:
+        # Stop paying for providers that can no longer win
+        for task in pending:
+            task.cancel()
+
+    for task in pending:
+        model_id = tasks[task]
+        logger.info(f"Cancelled {model_id} after {loop.time() - started:.2f}s")
+        results.append({
+            "success": False,
+            "error": f"Cancelled after {loop.time() - started:.2f}s",
+            "model": model_id,
+            "model_name": MODELS[model_id]["name"]
+        })
 
     logger.info(f"Got results from {len(results)} models")
     return results
 
+def score_response(result):
+    """
+    Cheap quality score in [0, 1] for a successful model response
+
+    Combines whether the mandatory crisis header (or the explicit "no crisis"
+    statement) is present, how many of the requested sections are covered,
+    and the response length relative to RESPONSE_TARGET_WORDS.
+    """
+    text = result["response"]
+    upper_text = text.upper()
+
+    has_crisis_header = any(marker in upper_text for marker in CRISIS_MARKERS)
+    coverage = sum(1 for section in RESPONSE_SECTIONS if section in upper_text) / len(RESPONSE_SECTIONS)
+    length = min(len(text.split()) / RESPONSE_TARGET_WORDS, 1.0)
+
+    return 0.4 * has_crisis_header + 0.35 * coverage + 0.25 * length
+
+@traced("select")
 def select_best_response(results):
     """
     Select the best response from multiple model results
@@ -543,7 +592,9 @@ def select_best_response(results):
     2. If no successful responses, return error
     3. If only one successful response, return it
     4. If multiple successful responses, select based on:
-       - Priority (lower number = higher priority)
+       - Quality score (crisis header, section coverage, length)
+       - Expected time to a good answer from the adaptive router, then
+         priority (lower number = higher priority), to break ties
 
     Args:
         results: List of response results from different models
@@ -569,61 +620,143 @@ def select_best_response(results):
         logger.info(f"Only one successful response from {successful_responses[0]['model_name']}, using it")
         return successful_responses[0]
 
-    # Sort by priority (defined in MODELS dictionary)
-    sorted_responses = sorted(
-        successful_responses,
-        key=lambda r: MODELS[r["model"]]["priority"]
-    )
+    scored = [(score_response(r), r) for r in successful_responses]
+    scored.sort(key=lambda item: (
+        -item[0],
+        model_router.expected_time(item[1]["model"]),
+        MODELS[item[1]["model"]]["priority"]
+    ))
 
-    # For now, just return the highest priority response
-    logger.info(f"Selected response from {sorted_responses[0]['model_name']} based on priority")
-    return sorted_responses[0]
+    score, best = scored[0]
+    score_summary = ", ".join(f"{r['model_name']}={s:.2f}" for s, r in scored)
+    logger.info(f"Selected response from {best['model_name']} with quality score {score:.2f} ({score_summary})")
+    return best
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
-    try:
-        # Format the prompt with chat history
-        chat_history = "\n".join(
-            f"{msg.sender}: {msg.text}"
-            for msg in request.chat_history
-        )
+@traced("prompt")
+def build_prompt(request: ChatRequest, chat_history=""):
+    """
+    Render the chat template for a request
 
-        # Determine which template to use based on the request source
-        # If coming from customize-plan (use_groq=True), use the customize template
-        # Otherwise, use the regular template for direct chatbot access
-        template_to_use = CUSTOMIZE_TEMPLATE if request.use_groq else REGULAR_TEMPLATE
-        logger.info(f"Using {'customize' if request.use_groq else 'regular'} template")
+    Args:
+        request: The chat request
+        chat_history: History block from history_summarizer.render
+    """
+    # Determine which template to use based on the request source
+    # If coming from customize-plan (use_groq=True), use the customize template
+    # Otherwise, use the regular template for direct chatbot access
+    mode = "customize" if request.use_groq else "regular"
+    prompt = render_prompt(mode, request.message, chat_history)
+    logger.info(f"Using {prompt.template.id} template (~{prompt.input_tokens} input tokens)")
+    return prompt
+
+def build_hf_payload(prompt, stream=False):
+    """
+    Build the Hugging Face text-generation payload for a rendered prompt
+    """
+    payload = {
+        "inputs": render_mixtral(prompt),
+        "parameters": {
+            "max_new_tokens": 1500,  # Significantly increased to accommodate comprehensive responses
+            "temperature": 0.7,
+            "top_p": 0.9,
+            "do_sample": True,
+            "return_full_text": False
+        }
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
 
-        prompt = template_to_use.format(
-            user_input=request.message,
-            chat_history=chat_history
-        )
+def lookup_cached_response(request: ChatRequest, key):
+    """
+    Look a request up in the exact-match cache, then the semantic cache
 
-        payload = {
-            "inputs": prompt,
-            "parameters": {
-                "max_new_tokens": 1500,  # Significantly increased to accommodate comprehensive responses
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "do_sample": True,
-                "return_full_text": False
-            }
-        }
+    The semantic tier is only consulted for messages without chat history,
+    since a follow-up question can mean something different in context.
+    """
+    cached = response_cache.get(key)
+    if cached is None and semantic_cache is not None and not request.chat_history:
+        cached = semantic_cache.lookup("customize" if request.use_groq else "regular", request.message)
+        if cached is not None:
+            logger.info("Semantic cache hit")
+            response_cache.set(key, cached)
+    return cached
+
+def store_cached_response(request: ChatRequest, key, value):
+    response_cache.set(key, value)
+    if semantic_cache is not None and not request.chat_history:
+        semantic_cache.store("customize" if request.use_groq else "regular", request.message, value)
+
+async def dispatch_chat(request: ChatRequest, key, chat_history):
+    """
+    Render the prompt, query the providers and cache a successful answer
 
-        logger.info(f"Processing request: {request.message[:50]}...")
+    Runs inside an admission slot, so at most ADMISSION_MAX_CONCURRENCY
+    generations are in progress (see admission.py).
+    """
+    lane = lane_for(request.use_groq)
+    with span("admission", lane=lane):
+        admitted_at = await admission_controller.acquire(lane)
+    try:
+        return await _dispatch_chat(request, key, chat_history)
+    finally:
+        admission_controller.release(admitted_at)
+
+async def _dispatch_chat(request: ChatRequest, key, chat_history):
+    prompt = build_prompt(request, chat_history)
+    payload = build_hf_payload(prompt)
+
+    logger.info(f"Processing request: {request.message[:50]}...")
+
+    # Check if we should use Groq specifically (for customize-plan queries)
+    if request.use_groq and MODELS["groq"]["enabled"] and DISPATCH_MODE == "hedge":
+        logger.info("Using Groq first with hedging as requested")
+        results = await query_all_models(prompt, payload, first="groq")
+        best_result = select_best_response(results)
+    elif request.use_groq and MODELS["groq"]["enabled"]:
+        logger.info("Using Groq model specifically as requested")
+        best_result = await query_groq(prompt)
+        logger.info(f"Groq result success: {best_result['success']}")
+        if best_result.get("rate_limited") and MODELS["huggingface"]["enabled"]:
+            logger.info("Groq is at its rate limit, failing over to Hugging Face")
+            best_result = await query_huggingface(payload, prompt.input_tokens)
+    else:
+        # Query all enabled models
+        results = await query_all_models(prompt, payload)
+
+        # Select the best response
+        best_result = select_best_response(results)
+        logger.info(f"Selected best result from model: {best_result.get('model_name', 'unknown')}")
+
+    if best_result["success"]:
+        store_cached_response(request, key, {"response": best_result["response"], "model_name": best_result["model_name"]})
+    return best_result
+
+async def answer_chat(request: ChatRequest):
+    """
+    Answer a chat request from the caches or the providers
 
-        # Check if we should use Groq specifically (for customize-plan queries)
-        if request.use_groq and MODELS["groq"]["enabled"]:
-            logger.info("Using Groq model specifically as requested")
-            best_result = query_groq(prompt, is_customize=True)
-            logger.info(f"Groq result success: {best_result['success']}")
-        else:
-            # Query all enabled models
-            results = query_all_models(prompt, payload, is_customize=request.use_groq)
+    Returns the best result dict; raises AdmissionRejected when shed.
+    """
+    # Older turns are folded into a summary so the prompt size stays bounded
+    with span("history", messages=len(request.chat_history or [])):
+        chat_history = history_summarizer.render(request.chat_history)
+    with span("cache") as cache_span:
+        key = cache_key(request.use_groq, request.message, chat_history)
+        cached = lookup_cached_response(request, key)
+        if cache_span is not None:
+            cache_span.set(hit=cached is not None)
+    if cached is not None:
+        logger.info(f"Cache hit, returning cached response from {cached['model_name']}")
+        return {"success": True, "response": cached["response"], "model_name": cached["model_name"]}
+
+    # Identical requests arriving while this one is in flight share its upstream call
+    return await chat_singleflight.do(key, lambda: dispatch_chat(request, key, chat_history))
 
-            # Select the best response
-            best_result = select_best_response(results)
-            logger.info(f"Selected best result from model: {best_result.get('model_name', 'unknown')}")
+@app.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(request: ChatRequest):
+    try:
+        best_result = await answer_chat(request)
 
         # If no successful responses, return error
         if not best_result["success"]:
@@ -640,6 +773,13 @@ async def chat_endpoint(request: ChatRequest):
             "response": best_result["response"],
             "model_used": best_result["model_name"]
         }
+    except AdmissionRejected as e:
+        logger.warning(f"Shedding {e.lane} request: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -650,25 +790,368 @@ async def chat_endpoint(request: ChatRequest):
             detail=f"Internal server error: {str(e)}"
         )
 
+async def answer_batch_item(request: ChatRequest, semaphore: asyncio.Semaphore):
+    """
+    Answer one batch item, reporting failures in the item instead of raising
+    """
+    async with semaphore:
+        try:
+            result = await answer_chat(request)
+        except AdmissionRejected as e:
+            return {"status": 503, "error": str(e), "retry_after": e.retry_after}
+        except Exception as e:
+            logger.error(f"Unexpected error in batch item: {e}")
+            return {"status": 500, "error": f"Internal server error: {str(e)}"}
+    if not result["success"]:
+        return {"status": 500, "error": result["error"], "model_used": result.get("model_name")}
+    return {"status": 200, "response": result["response"], "model_used": result["model_name"]}
+
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch_endpoint(batch: ChatBatchRequest):
+    """
+    Answer many chat requests in one call
+
+    Identical items are answered once. At most CHAT_BATCH_PARALLELISM unique
+    items are in progress at a time, and each still goes through the caches,
+    coalescing and admission control like a single /chat request. Results
+    come back in request order, each with its own status.
+    """
+    if len(batch.requests) > CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(batch.requests)} exceeds the limit of {CHAT_BATCH_MAX_ITEMS} requests"
+        )
+
+    unique: Dict[str, int] = {}
+    positions = [unique.setdefault(item.model_dump_json(), len(unique)) for item in batch.requests]
+    items = {position: batch.requests[index] for index, position in enumerate(positions)}
+    semaphore = asyncio.Semaphore(CHAT_BATCH_PARALLELISM)
+    logger.info(f"Batch of {len(batch.requests)} requests, {len(unique)} unique")
+
+    answers = await asyncio.gather(*(answer_batch_item(items[position], semaphore) for position in range(len(unique))))
+    return {
+        "results": [answers[position] for position in positions],
+        "unique_requests": len(unique)
+    }
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Stream the answer as Server-Sent Events
+
+    Sends a `token` event for every chunk of text as it arrives, then one
+    `done` event carrying model_used, time to first token and total latency.
+    If a provider fails or ends its stream before the first token the next
+    one is tried. When none streams an answer, the non-streaming dispatch
+    gets one last try and its answer is sent as a single `token` event; an
+    `error` event is sent when that fails too.
+    """
+    chat_history = history_summarizer.render(request.chat_history)
+    key = cache_key(request.use_groq, request.message, chat_history)
+    cached = lookup_cached_response(request, key)
+    prompt = build_prompt(request, chat_history) if cached is None else None
+    streamers = {
+        "huggingface": (
+            HF_MODEL_NAME, lambda: stream_huggingface(build_hf_payload(prompt, stream=True), prompt.input_tokens)
+        ),
+        "groq": (f"groq/{GROQ_MODEL_NAME}", lambda: stream_groq(prompt)),
+    }
+    order = dispatch_order(first="groq" if request.use_groq else None)
+    logger.info(f"Streaming request: {request.message[:50]}...")
+
+    lane = lane_for(request.use_groq)
+    if cached is None:
+        # Shed before the 200 goes out; the slot itself is taken inside the
+        # stream so it is always released by the generator
+        try:
+            admission_controller.check(lane)
+        except AdmissionRejected as e:
+            logger.warning(f"Shedding {e.lane} stream request: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+    async def event_stream():
+        if cached is not None:
+            async for event in generate_events():
+                yield event
+            return
+        try:
+            admitted_at = await admission_controller.acquire(lane)
+        except AdmissionRejected as e:
+            yield sse_event("error", {"error": str(e), "retry_after": e.retry_after})
+            return
+        try:
+            async for event in generate_events():
+                yield event
+        finally:
+            admission_controller.release(admitted_at)
+
+    async def generate_events():
+        started = time.perf_counter()
+        errors = []
+
+        if cached is not None:
+            logger.info(f"Cache hit, streaming cached response from {cached['model_name']}")
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            yield sse_event("token", {"text": cached["response"]})
+            yield sse_event("done", {
+                "model_used": cached["model_name"],
+                "time_to_first_token_ms": elapsed_ms,
+                "total_latency_ms": elapsed_ms,
+                "cached": True
+            })
+            return
+
+        for model_id in order:
+            model_name, streamer = streamers[model_id]
+            breaker = circuit_breakers[model_id]
+            if not breaker.allow_request():
+                errors.append(f"{model_name}: circuit {breaker.state}")
+                continue
+            try:
+                allowed = await get_rate_limiter(model_id).acquire(estimate_tokens(prompt.input_tokens))
+            except BaseException:
+                breaker.release()
+                raise
+            if not allowed:
+                breaker.release()
+                observe_provider_call(model_id, None, {"success": False, "rate_limited": True})
+                errors.append(f"{model_name}: rate limit reached")
+                continue
+
+            provider_started = time.perf_counter()
+            first_token_at = None
+            chunks = []
+            try:
+                async for text in streamer():
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        logger.info(f"First token from {model_name} after {first_token_at - started:.2f}s")
+                    chunks.append(text)
+                    yield sse_event("token", {"text": text})
+            except Exception as e:
+                logger.error(f"Streaming from {model_name} failed: {e}")
+                status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                breaker.record_failure(status_code, str(e))
+                observe_provider_call(
+                    model_id, time.perf_counter() - provider_started,
+                    {"success": False, "status_code": status_code}
+                )
+                if is_provider_failure(status_code):
+                    model_router.observe(model_id, time.perf_counter() - provider_started, False)
+                if first_token_at is not None:
+                    # Part of the answer is already on the wire, so switching providers would garble it
+                    yield sse_event("error", {"error": str(e), "model_used": model_name})
+                    return
+                errors.append(f"{model_name}: {e}")
+                continue
+            except BaseException:
+                # Client went away mid-stream
+                breaker.release()
+                raise
+
+            answer = "".join(chunks)
+            if not answer:
+                # A 200 without tokens (a plain JSON body, or a bare [DONE]) is no answer
+                logger.error(f"Stream from {model_name} ended without any tokens")
+                breaker.record_failure(None, "empty stream")
+                observe_provider_call(model_id, time.perf_counter() - provider_started, {"success": False})
+                model_router.observe(model_id, time.perf_counter() - provider_started, False)
+                errors.append(f"{model_name}: stream ended without tokens")
+                continue
+
+            breaker.record_success()
+            observe_provider_call(model_id, time.perf_counter() - provider_started, {"success": True})
+            model_router.observe(model_id, time.perf_counter() - provider_started, True, count_tokens(answer))
+            total = time.perf_counter() - started
+            ttft = first_token_at - started
+            store_cached_response(request, key, {"response": answer, "model_name": model_name})
+            logger.info(f"Streamed {len(answer)} chars from {model_name}: first token {ttft:.2f}s, total {total:.2f}s")
+            yield sse_event("done", {
+                "model_used": model_name,
+                "time_to_first_token_ms": round(ttft * 1000, 1),
+                "total_latency_ms": round(total * 1000, 1)
+            })
+            return
+
+        # Nothing is on the wire yet, so the non-streaming path can still answer
+        logger.warning(f"No provider streamed an answer, falling back to a full response. Errors: {'; '.join(errors)}")
+        try:
+            result = await _dispatch_chat(request, key, chat_history)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if result["success"]:
+            total = time.perf_counter() - started
+            yield sse_event("token", {"text": result["response"]})
+            yield sse_event("done", {
+                "model_used": result["model_name"],
+                "time_to_first_token_ms": round(total * 1000, 1),
+                "total_latency_ms": round(total * 1000, 1),
+                "streamed": False
+            })
+            return
+
+        errors.append(f"fallback: {result.get('error', 'no answer')}")
+        error_msg = f"All models failed. Errors: {'; '.join(errors)}"
+        logger.error(error_msg)
+        yield sse_event("error", {"error": error_msg})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.on_event("shutdown")
+async def shutdown_provider_clients():
+    await close_all_clients()
+
 @app.get("/health")
 async def health_check():
     models_info = {}
 
     # Add information about each model
     for model_id, model_config in MODELS.items():
+        breaker = circuit_breakers[model_id]
         models_info[model_id] = {
             "name": model_config["name"],
             "enabled": model_config["enabled"],
             "priority": model_config["priority"],
-            "status": "available" if model_config["enabled"] else "not configured"
+            "status": breaker.state if model_config["enabled"] else "not configured",
+            "circuit": breaker.snapshot()
         }
 
     return {
         "status": "healthy",
         "models": models_info,
-        "fallback_chain": "enabled"
+        "fallback_chain": "enabled",
+        "cache": response_cache.stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else "disabled",
+        "coalescing": chat_singleflight.stats(),
+        "admission": admission_controller.snapshot(),
+        "rate_limits": {model_id: get_rate_limiter(model_id).snapshot() for model_id in MODELS},
+        "recording": recording_stats(),
+        "fault_injection": fault_injector.snapshot() if FAULT_INJECTION_ENABLED else "disabled",
+        "input_tokens": {
+            model_id: {
+                "requests": stats["requests"],
+                "avg_input_tokens": round(stats["input_tokens"] / stats["requests"], 1) if stats["requests"] else 0
+            }
+            for model_id, stats in input_token_stats.items()
+        },
+        "dispatch": {
+            "mode": DISPATCH_MODE,
+            "hedge_delay_s": {model_id: latency_tracker.hedge_delay(model_id) for model_id in MODELS},
+            "hedging": hedge_stats.snapshot()
+        }
     }
 
+@app.get("/templates")
+async def templates():
+    """
+    Registered prompt templates with their precomputed prefix token counts
+    """
+    return template_registry.describe()
+
+if FAULT_INJECTION_ENABLED:
+    # Only exists when fault injection is switched on (see fault_injection.py)
+    @app.get("/admin/faults")
+    async def get_faults():
+        return fault_injector.snapshot()
+
+    @app.put("/admin/faults")
+    async def set_faults(config: FaultConfig):
+        """
+        Replace the fault injection rules
+        """
+        try:
+            if config.spec is not None:
+                rules = parse_rules(config.spec)
+            else:
+                rules = [FaultRule(**rule.model_dump()) for rule in config.rules or []]
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        fault_injector.set_rules(rules)
+        return fault_injector.snapshot()
+
+    @app.delete("/admin/faults")
+    async def clear_faults():
+        fault_injector.set_rules([])
+        fault_injector.injected.clear()
+        return fault_injector.snapshot()
+
+# Values other modules already count are read when /metrics is scraped
+metrics_registry.add_collector(
+    "yatra_provider_retries", "Provider retries by provider", "counter",
+    lambda: [({"provider": provider}, count) for provider, count in provider_retry_policy.retries.items()]
+)
+metrics_registry.add_collector(
+    "yatra_provider_retry_budget_exhausted", "Retries skipped because the retry budget was spent", "counter",
+    lambda: [({"provider": provider}, count) for provider, count in provider_retry_policy.budget_exhausted.items()]
+)
+metrics_registry.add_collector(
+    "yatra_provider_rate_limited", "Provider calls rejected by the client-side rate limiter", "counter",
+    lambda: [({"provider": model_id}, get_rate_limiter(model_id).rejected) for model_id in MODELS]
+)
+metrics_registry.add_collector(
+    "yatra_circuit_open", "1 while the provider's circuit breaker is open", "gauge",
+    lambda: [({"provider": model_id}, int(breaker.state == "open")) for model_id, breaker in circuit_breakers.items()]
+)
+
+def _cache_samples(field):
+    caches = [("exact", response_cache)]
+    if semantic_cache is not None:
+        caches.append(("semantic", semantic_cache))
+    return [({"cache": name}, cache.stats()[field]) for name, cache in caches]
+
+metrics_registry.add_collector("yatra_cache_hits", "Cache hits", "counter", lambda: _cache_samples("hits"))
+metrics_registry.add_collector("yatra_cache_misses", "Cache misses", "counter", lambda: _cache_samples("misses"))
+metrics_registry.add_collector("yatra_cache_hit_ratio", "Cache hit ratio since start", "gauge", lambda: _cache_samples("hit_ratio"))
+metrics_registry.add_collector(
+    "yatra_coalesced_requests", "Requests that shared another request's upstream call", "counter",
+    lambda: [({}, chat_singleflight.followers)]
+)
+metrics_registry.add_collector(
+    "yatra_generations_in_flight", "Upstream generations holding an admission slot", "gauge",
+    lambda: [({}, admission_controller.in_flight)]
+)
+metrics_registry.add_collector(
+    "yatra_admission_queue_depth", "Requests waiting for an admission slot", "gauge",
+    lambda: [({"lane": lane}, stats["queue_depth"]) for lane, stats in admission_controller.snapshot()["lanes"].items()]
+)
+metrics_registry.add_collector(
+    "yatra_admission_wait_p95_seconds", "95th percentile queue wait over the last 1000 admissions", "gauge",
+    lambda: [({"lane": lane}, stats["p95_wait_ms"] / 1000) for lane, stats in admission_controller.snapshot()["lanes"].items()]
+)
+metrics_registry.add_collector(
+    "yatra_admission_shed", "Requests shed by admission control", "counter",
+    lambda: [
+        ({"lane": lane, "reason": reason}, count)
+        for lane, stats in admission_controller.snapshot()["lanes"].items()
+        for reason, count in stats["shed"].items()
+    ]
+)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text exposition of the backend's metrics
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/router")
+async def router_scores():
+    """
+    Live routing scores: EWMA latency, success rate and tokens/sec per provider
+    """
+    return model_router.scores()
+
 @app.get("/")
 async def root():
     return {
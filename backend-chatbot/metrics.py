@@ -0,0 +1,261 @@
+"""
+Prometheus-style metrics for the chat backend.
+
+A minimal, dependency-free implementation of counters, gauges and
+histograms that renders the Prometheus text exposition format. The app runs
+on a single asyncio event loop per worker, so recording is a couple of dict
+lookups and integer additions with no locks. Histograms keep per-bucket
+counts and compute the cumulative values only when /metrics is scraped.
+
+Values that other modules already count (cache hits, retries, admission
+queue depth, ...) are not recorded twice: collectors registered with
+`registry.add_collector` read them at scrape time.
+"""
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+SIZE_BUCKETS = (128, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        return [(f"{self.name}_total", self._labels(labels), value) for labels, value in self._values.items()]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float):
+        self._values[labels] = value
+
+    def samples(self):
+        return [(self.name, self._labels(labels), value) for labels, value in self._values.items()]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (last one is +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self):
+        samples = []
+        for labels, (counts, total) in self._series.items():
+            base = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", dict(base, le=_format_value(bound)), cumulative))
+            samples.append((f"{self.name}_count", base, cumulative))
+            samples.append((f"{self.name}_sum", base, total))
+        return samples
+
+
+class CollectedMetric(Metric):
+    """
+    A metric whose samples are read from elsewhere when scraped
+    """
+
+    def __init__(self, name, documentation, type_, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        super().__init__(name, documentation)
+        self.type = type_
+        self.collect = collect
+
+    def samples(self):
+        suffix = "_total" if self.type == "counter" else ""
+        return [(f"{self.name}{suffix}", labels, value) for labels, value in self.collect()]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, name, documentation, type_, collect):
+        """
+        Expose values kept by another module; `collect` returns (labels, value) pairs
+        """
+        return self.register(CollectedMetric(name, documentation, type_, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                lines.append(f"# collecting {metric.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "yatra_http_requests", "HTTP requests by endpoint and status code", ("endpoint", "status")
+)
+http_request_duration = registry.histogram(
+    "yatra_http_request_duration_seconds", "End-to-end request latency, until the last byte is sent", ("endpoint",)
+)
+http_response_size = registry.histogram(
+    "yatra_http_response_size_bytes", "Response body size", ("endpoint",), SIZE_BUCKETS
+)
+http_in_flight = registry.gauge(
+    "yatra_http_requests_in_flight", "Requests currently being served", ("endpoint",)
+)
+provider_latency = registry.histogram(
+    "yatra_provider_latency_seconds", "Provider call latency including retries", ("provider", "outcome")
+)
+provider_errors = registry.counter(
+    "yatra_provider_errors", "Failed provider calls by status code or error kind", ("provider", "code")
+)
+
+# Only these paths get their own label; anything else (404s, scans) is "other"
+TRACKED_PATHS = {"/chat", "/chat/stream", "/chat/batch", "/health", "/metrics", "/router", "/templates", "/"}
+
+
+def observe_provider_call(provider: str, latency: Optional[float], result: dict):
+    """
+    Record a finished provider call from its result dict
+
+    Args:
+        provider: Provider id
+        latency: Seconds the call took, or None if it never went out
+        result: The call's result dict
+    """
+    if not METRICS_ENABLED:
+        return
+    if latency is not None:
+        provider_latency.observe(latency, provider, "success" if result["success"] else "error")
+    if not result["success"]:
+        provider_errors.inc(provider, error_code(result))
+
+
+def error_code(result: dict) -> str:
+    if result.get("circuit_open"):
+        return "circuit_open"
+    if result.get("rate_limited"):
+        return "rate_limited"
+    return str(result.get("status_code") or "transport")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording rate, latency, size and in-flight requests
+
+    Wraps `send` instead of using BaseHTTPMiddleware, so streaming responses
+    pass through untouched and are timed until their last chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = scope["path"] if scope["path"] in TRACKED_PATHS else "other"
+        started = time.perf_counter()
+        state = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc(endpoint)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec(endpoint)
+            http_requests.inc(endpoint, str(state["status"]))
+            http_request_duration.observe(time.perf_counter() - started, endpoint)
+            http_response_size.observe(state["size"], endpoint)
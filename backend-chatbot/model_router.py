@@ -0,0 +1,116 @@
+"""
+Adaptive latency- and success-aware provider routing.
+
+Replaces the static "priority" ordering in MODELS. For every provider the
+router keeps exponentially weighted moving averages of latency, success rate
+and output tokens per second, and orders providers by the expected time to a
+good answer: latency / success rate, i.e. the expected latency including the
+attempts that fail and have to fall through. With probability ROUTER_EXPLORE
+a random provider is moved to the front, so stats for the others stay fresh.
+Static priority only breaks ties, which in practice means before any traffic
+has been observed.
+"""
+import os
+import random
+import time
+from typing import Dict, List
+
+ROUTER_ALPHA = float(os.getenv("ROUTER_ALPHA", "0.2"))
+ROUTER_EXPLORE = float(os.getenv("ROUTER_EXPLORE", "0.05"))
+# Priors used until a provider has been observed
+ROUTER_PRIOR_LATENCY = float(os.getenv("ROUTER_PRIOR_LATENCY", "10"))
+ROUTER_PRIOR_SUCCESS = 0.9
+MIN_SUCCESS_RATE = 0.01
+
+
+class ProviderStats:
+    def __init__(self):
+        self.latency = ROUTER_PRIOR_LATENCY
+        self.success_rate = ROUTER_PRIOR_SUCCESS
+        self.tokens_per_second = 0.0
+        self.samples = 0
+        self.last_seen = None
+
+    def _ewma(self, current, value):
+        # The first sample replaces the prior outright
+        return value if self.samples == 0 else current + ROUTER_ALPHA * (value - current)
+
+    def observe(self, latency: float, success: bool, output_tokens: int = 0):
+        self.success_rate = self._ewma(self.success_rate, 1.0 if success else 0.0)
+        if success:
+            self.latency = self._ewma(self.latency, latency)
+            if latency > 0 and output_tokens:
+                self.tokens_per_second = self._ewma(self.tokens_per_second, output_tokens / latency)
+        self.samples += 1
+        self.last_seen = time.time()
+
+    def observe_abandoned(self, elapsed: float):
+        """
+        A call that was cancelled after `elapsed` seconds took at least that long
+        """
+        if elapsed > self.latency:
+            self.latency += ROUTER_ALPHA * (elapsed - self.latency)
+
+    def expected_time(self) -> float:
+        return self.latency / max(self.success_rate, MIN_SUCCESS_RATE)
+
+
+class ModelRouter:
+    def __init__(self, explore: float = ROUTER_EXPLORE):
+        self.explore = explore
+        self.stats: Dict[str, ProviderStats] = {}
+        self.explorations = 0
+
+    def _stats(self, provider: str) -> ProviderStats:
+        if provider not in self.stats:
+            self.stats[provider] = ProviderStats()
+        return self.stats[provider]
+
+    def observe(self, provider: str, latency: float, success: bool, output_tokens: int = 0):
+        self._stats(provider).observe(latency, success, output_tokens)
+
+    def observe_abandoned(self, provider: str, elapsed: float):
+        """
+        Record a call cancelled before it answered (it lost a hedge or fan-out)
+
+        Without this a provider that is always too slow would never report the
+        slowness and would keep its old, better latency forever.
+        """
+        self._stats(provider).observe_abandoned(elapsed)
+
+    def expected_time(self, provider: str) -> float:
+        return self._stats(provider).expected_time()
+
+    def order(self, providers: List[str], priorities: Dict[str, int]) -> List[str]:
+        """
+        Providers sorted by expected time to a good answer, best first
+
+        Args:
+            providers: Candidate provider ids
+            priorities: Static priorities, used to break ties
+        """
+        ranked = sorted(providers, key=lambda p: (self.expected_time(p), priorities.get(p, 0)))
+        if len(ranked) > 1 and random.random() < self.explore:
+            self.explorations += 1
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    def scores(self) -> dict:
+        return {
+            "explore_probability": self.explore,
+            "explorations": self.explorations,
+            "providers": {
+                provider: {
+                    "expected_time_s": round(stats.expected_time(), 3),
+                    "ewma_latency_s": round(stats.latency, 3),
+                    "ewma_success_rate": round(stats.success_rate, 3),
+                    "ewma_tokens_per_second": round(stats.tokens_per_second, 1),
+                    "samples": stats.samples,
+                    "last_seen": stats.last_seen
+                }
+                for provider, stats in self.stats.items()
+            }
+        }
+
+
+model_router = ModelRouter()
@@ -0,0 +1,52 @@
+"""
+Provider-specific prompt rendering.
+
+The templates in template_registry.py are the single source of the
+instructions. Each provider gets them in its native format: the Mixtral
+`[INST]` wrapper for Hugging Face and chat messages for Groq. Groq used to
+receive the rendered `[INST]` template as the user message plus a
+near-identical system message, paying for the instruction block twice on
+every call.
+"""
+from template_registry import RenderedPrompt, registry
+from token_counter import count_tokens
+
+
+def render_prompt(mode: str, user_input: str, chat_history: str = "") -> RenderedPrompt:
+    """
+    Provider-neutral prompt for a request, from the active template version
+
+    Args:
+        mode: "customize" or "regular"
+        user_input: The user's message
+        chat_history: History block from chat_history.HistorySummarizer
+    """
+    return registry.get(mode).render(user_input, chat_history)
+
+
+def render_mixtral(prompt: RenderedPrompt) -> str:
+    """
+    Mixtral instruct format for the Hugging Face text-generation API
+    """
+    return f"<s>[INST] {prompt.text} [/INST]"
+
+
+def render_chat_messages(prompt: RenderedPrompt) -> list:
+    """
+    OpenAI-style chat messages for Groq: the static template prefix as the
+    system message, the per-request suffix as the user message
+    """
+    system = prompt.prefix.strip()
+    if not system:
+        return [{"role": "user", "content": prompt.text}]
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt.suffix.strip()}
+    ]
+
+
+def message_tokens(messages: list) -> int:
+    """
+    Estimated input tokens of a chat-messages payload
+    """
+    return sum(count_tokens(message["content"]) for message in messages)
@@ -0,0 +1,107 @@
+"""
+Async HTTP client layer for the upstream model providers.
+
+Every provider gets one long-lived httpx.AsyncClient with its own connection
+pool, so /chat requests reuse keep-alive connections instead of paying a new
+TCP and TLS handshake per call, and a slow provider no longer blocks the
+event loop.
+"""
+import os
+from typing import Dict, Optional
+
+import httpx
+
+from fault_injection import fault_transport
+from provider_recording import provider_transport, close_store
+
+# Pool size and timeouts can be tuned per provider with <NAME>_POOL_SIZE,
+# e.g. HUGGINGFACE_POOL_SIZE=50, or globally with PROVIDER_POOL_SIZE.
+DEFAULT_POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "20"))
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("PROVIDER_CONNECT_TIMEOUT", "10"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("PROVIDER_READ_TIMEOUT", "120"))
+KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "60"))
+
+
+class ProviderClient:
+    """
+    Pooled async HTTP client for a single provider
+
+    The underlying httpx.AsyncClient is created lazily on first use so it is
+    bound to the event loop of the worker process that serves the request.
+    """
+
+    def __init__(self, name: str, headers: Dict[str, str], pool_size: Optional[int] = None):
+        self.name = name
+        self.headers = headers
+        self.pool_size = pool_size or int(
+            os.getenv(f"{name.upper()}_POOL_SIZE", DEFAULT_POOL_SIZE)
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            )
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=limits,
+                timeout=httpx.Timeout(DEFAULT_READ_TIMEOUT, connect=DEFAULT_CONNECT_TIMEOUT),
+                # Record/replay mode swaps the transport (see provider_recording.py),
+                # fault injection wraps it (see fault_injection.py)
+                transport=fault_transport(self.name, provider_transport(self.name, limits), limits),
+            )
+        return self._client
+
+    async def post(self, url: str, payload: dict) -> httpx.Response:
+        """
+        POST a JSON payload to the provider over the shared connection pool
+        """
+        return await self.client.post(url, json=payload)
+
+    async def post_stream(self, url: str, payload: dict) -> httpx.Response:
+        """
+        POST a JSON payload and return as soon as the response headers arrive
+
+        The body is left unread for the caller to iterate; the caller must
+        close the response with `aclose()`.
+        """
+        request = self.client.build_request("POST", url, json=payload)
+        return await self.client.send(request, stream=True)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_clients: Dict[str, ProviderClient] = {}
+
+
+def register_client(name: str, headers: Dict[str, str], pool_size: Optional[int] = None) -> ProviderClient:
+    """
+    Register (or replace) the pooled client used for a provider
+
+    Args:
+        name: Provider id, matching the keys of MODELS in main.py
+        headers: Default headers sent with every request (auth, content type)
+        pool_size: Maximum pooled connections; defaults to <NAME>_POOL_SIZE or PROVIDER_POOL_SIZE
+    """
+    _clients[name] = ProviderClient(name, headers, pool_size)
+    return _clients[name]
+
+
+def get_client(name: str) -> ProviderClient:
+    return _clients[name]
+
+
+async def close_all_clients():
+    """
+    Close every pooled connection; called on application shutdown
+    """
+    for provider_client in _clients.values():
+        await provider_client.aclose()
+    close_store()
@@ -0,0 +1,307 @@
+"""
+Record and replay upstream provider traffic.
+
+PROVIDER_RECORDING=record wraps each provider's httpx transport so every
+exchange is appended to PROVIDER_RECORDING_FILE: the request body, the
+response status and headers, and the response body as timed chunks (time to
+first byte, then the offset of each chunk). Request headers, which carry the
+API keys, are never written. The file is gzip-compressed JSON lines, one
+exchange per line; record with a single worker so lines don't interleave.
+
+PROVIDER_RECORDING=replay serves those exchanges back without touching the
+network. A request is matched on provider, method, path and body; repeated
+identical requests get their recordings in turn. Requests that were never
+recorded get the provider's other recordings round-robin, so a recorded
+traffic shape can drive a benchmark with different prompts
+(PROVIDER_REPLAY_ON_MISS=error answers them with a 404 instead). Every
+recorded delay is multiplied by PROVIDER_REPLAY_LATENCY_SCALE: 1 reproduces
+the original latency profile, 0.5 halves it, 0 replays instantly. Streaming
+responses are replayed chunk by chunk at their recorded offsets.
+"""
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from itertools import cycle
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger("yatra-sevak")
+
+PROVIDER_RECORDING = os.getenv("PROVIDER_RECORDING", "off").lower()
+PROVIDER_RECORDING_FILE = os.getenv("PROVIDER_RECORDING_FILE", "recordings/providers.jsonl.gz")
+PROVIDER_REPLAY_LATENCY_SCALE = float(os.getenv("PROVIDER_REPLAY_LATENCY_SCALE", "1"))
+PROVIDER_REPLAY_ON_MISS = os.getenv("PROVIDER_REPLAY_ON_MISS", "any").lower()
+# Chunks arriving closer together than this are stored as one
+CHUNK_MERGE_WINDOW = 0.005
+# Response headers that describe the original connection, not the response
+SKIPPED_HEADERS = {"connection", "keep-alive", "transfer-encoding", "content-length", "date", "set-cookie"}
+
+
+def request_key(provider: str, request: httpx.Request) -> str:
+    """
+    Stable key for matching a replayed request to its recording
+    """
+    digest = hashlib.sha256()
+    for part in (provider.encode(), request.method.encode(), request.url.path.encode(), request.content):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def _request_body(request: httpx.Request):
+    try:
+        return json.loads(request.content)
+    except ValueError:
+        return request.content.decode("utf-8", errors="replace")
+
+
+class RecordingStore:
+    """
+    Append-only gzip JSON-lines file of recorded exchanges
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def append(self, record: dict):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = gzip.open(self.path, "at", encoding="utf-8")
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        # Each flush ends a gzip block, so a killed recording stays readable
+        self._file.flush()
+
+    def load(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    records.append(json.loads(line))
+            except (EOFError, ValueError) as e:
+                # A recording cut off mid-write: keep what is complete
+                logger.warning(f"Recording {self.path} is truncated after {len(records)} exchanges: {e}")
+        return records
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RecordingStream(httpx.AsyncByteStream):
+    """
+    Passes the upstream body through while noting when each chunk arrived
+    """
+
+    def __init__(self, stream, on_close, started: float):
+        self._stream = stream
+        self._on_close = on_close
+        self._started = started
+        self.chunks = []
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            offset = time.perf_counter() - self._started
+            if self.chunks and offset - self.chunks[-1][0] < CHUNK_MERGE_WINDOW:
+                self.chunks[-1][1] += chunk
+            else:
+                self.chunks.append([offset, chunk])
+            yield chunk
+
+    async def aclose(self):
+        await self._stream.aclose()
+        self._on_close(self.chunks)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Forwards requests to the real transport and records every exchange
+
+    Args:
+        provider: Provider id the recordings are filed under
+        transport: The transport that actually sends the requests
+        store: Where the exchanges are written
+    """
+
+    def __init__(self, provider: str, transport: httpx.AsyncBaseTransport, store: RecordingStore):
+        self.provider = provider
+        self.transport = transport
+        self.store = store
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        ttfb = time.perf_counter() - started
+        headers = [(name, value) for name, value in response.headers.items() if name not in SKIPPED_HEADERS]
+        # Compressed bodies can't be stored as text
+        binary = "content-encoding" in response.headers
+
+        def save(chunks):
+            self.store.append({
+                "provider": self.provider,
+                "key": request_key(self.provider, request),
+                "method": request.method,
+                "url": str(request.url),
+                "request": _request_body(request),
+                "status": response.status_code,
+                "headers": headers,
+                "ttfb": round(ttfb, 4),
+                "binary": binary,
+                "chunks": [
+                    [round(offset, 4), base64.b64encode(data).decode() if binary else data.decode("utf-8", errors="replace")]
+                    for offset, data in chunks
+                ],
+                "recorded_at": round(time.time(), 3)
+            })
+
+        return httpx.Response(
+            response.status_code, headers=response.headers,
+            stream=RecordingStream(response.stream, save, started), extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: List[bytes], delays: List[float]):
+        self.chunks = chunks
+        self.delays = delays
+
+    async def __aiter__(self):
+        for chunk, delay in zip(self.chunks, self.delays):
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Answers requests from recorded exchanges, with the recorded timing scaled
+
+    Args:
+        provider: Provider id whose recordings are served
+        records: That provider's recorded exchanges, in recording order
+        latency_scale: Multiplier for every recorded delay
+        on_miss: "any" to serve another recording for unknown requests, "error" for a 404
+    """
+
+    def __init__(self, provider: str, records: List[dict], latency_scale: float = PROVIDER_REPLAY_LATENCY_SCALE,
+                 on_miss: str = PROVIDER_REPLAY_ON_MISS):
+        self.provider = provider
+        self.latency_scale = latency_scale
+        self.on_miss = on_miss
+        by_key = defaultdict(list)
+        for record in records:
+            by_key[record["key"]].append(record)
+        self._by_key = {key: cycle(matches) for key, matches in by_key.items()}
+        self._any = cycle(records) if records else None
+        self.hits = 0
+        self.misses = 0
+
+    def _find(self, request: httpx.Request) -> Optional[dict]:
+        matches = self._by_key.get(request_key(self.provider, request))
+        if matches is not None:
+            self.hits += 1
+            return next(matches)
+        self.misses += 1
+        if self.on_miss == "any" and self._any is not None:
+            return next(self._any)
+        return None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        record = self._find(request)
+        if record is None:
+            return httpx.Response(404, json={"error": f"No recorded {self.provider} response for this request"})
+
+        await asyncio.sleep(record["ttfb"] * self.latency_scale)
+        chunks, delays = [], []
+        previous = record["ttfb"]
+        for offset, data in record["chunks"]:
+            chunks.append(base64.b64decode(data) if record["binary"] else data.encode("utf-8"))
+            delays.append(max(offset - previous, 0.0) * self.latency_scale)
+            previous = offset
+        return httpx.Response(record["status"], headers=record["headers"], stream=ReplayStream(chunks, delays))
+
+
+_store: Optional[RecordingStore] = None
+_replay_records: Optional[Dict[str, List[dict]]] = None
+_replay_transports: Dict[str, ReplayTransport] = {}
+
+
+def _get_store() -> RecordingStore:
+    global _store
+    if _store is None:
+        _store = RecordingStore(PROVIDER_RECORDING_FILE)
+    return _store
+
+
+def replay_records(provider: str) -> List[dict]:
+    """
+    Recorded exchanges for a provider, loaded once per process
+    """
+    global _replay_records
+    if _replay_records is None:
+        _replay_records = defaultdict(list)
+        for record in _get_store().load():
+            _replay_records[record["provider"]].append(record)
+        logger.info(
+            f"Replaying provider traffic from {PROVIDER_RECORDING_FILE}: "
+            + ", ".join(f"{name}={len(records)}" for name, records in _replay_records.items())
+        )
+    return _replay_records.get(provider, [])
+
+
+def replay_available(provider: str) -> bool:
+    """
+    True when replay mode can answer requests for this provider
+    """
+    return PROVIDER_RECORDING == "replay" and bool(replay_records(provider))
+
+
+def provider_transport(provider: str, limits: httpx.Limits) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Transport for a provider's client, or None for httpx's default
+
+    Args:
+        provider: Provider id
+        limits: Connection pool limits for the real transport
+    """
+    if PROVIDER_RECORDING == "record":
+        return RecordingTransport(provider, httpx.AsyncHTTPTransport(limits=limits), _get_store())
+    if PROVIDER_RECORDING == "replay":
+        if provider not in _replay_transports:
+            _replay_transports[provider] = ReplayTransport(provider, replay_records(provider))
+        return _replay_transports[provider]
+    return None
+
+
+def recording_stats() -> dict:
+    """
+    Mode and replay hit/miss counts, reported in /health
+    """
+    stats = {"mode": PROVIDER_RECORDING}
+    if PROVIDER_RECORDING != "off":
+        stats["file"] = PROVIDER_RECORDING_FILE
+    if PROVIDER_RECORDING == "replay":
+        stats["latency_scale"] = PROVIDER_REPLAY_LATENCY_SCALE
+        stats["providers"] = {
+            name: {"recordings": len(replay_records(name)), "hits": transport.hits, "misses": transport.misses}
+            for name, transport in _replay_transports.items()
+        }
+    return stats
+
+
+def close_store():
+    if _store is not None:
+        _store.close()
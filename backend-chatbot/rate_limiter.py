@@ -0,0 +1,326 @@
+"""
+Client-side token-bucket rate limiting per provider.
+
+Every provider has two buckets that mirror its quota: one for requests per
+minute and one for (estimated) tokens per minute. A call has to take from
+both at once before it goes out. When there is not enough capacity it waits
+up to RATE_LIMIT_MAX_WAIT seconds for the buckets to refill; beyond that it
+is rejected locally so the caller can fail over to another provider instead
+of getting a 429 from upstream. A 429 that still gets through drains the
+request bucket for the Retry-After period, so every worker backs off.
+
+Bucket state lives in a pluggable backend, chosen with RATE_LIMIT_BACKEND:
+  memory  per process (default)
+  file    a JSON file guarded by flock, shared by all workers on one host
+  redis   any Redis-compatible server, shared across nodes (needs `redis`)
+
+Limits come from <NAME>_RPM and <NAME>_TPM, e.g. GROQ_RPM=30; 0 disables
+that bucket.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("yatra-sevak")
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_FILE = os.getenv("RATE_LIMIT_FILE", "/tmp/yatra-sevak-rate-limits.json")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "1.0"))
+# Tokens reserved for the completion, on top of the prompt estimate
+RATE_LIMIT_OUTPUT_TOKENS = int(os.getenv("RATE_LIMIT_OUTPUT_TOKENS", "800"))
+
+# Published free-tier quotas; override to match the account's plan
+DEFAULT_LIMITS = {
+    "groq": {"rpm": 30, "tpm": 30000},
+    "huggingface": {"rpm": 60, "tpm": 0},
+}
+
+# (key, capacity, refill per second, cost)
+BucketSpec = Tuple[str, float, float, float]
+
+
+def take_from_buckets(state: Dict[str, list], specs: List[BucketSpec], now: float) -> float:
+    """
+    Take `cost` from every bucket, or from none of them
+
+    Returns 0.0 when the costs were taken, otherwise the seconds until all
+    buckets will have enough. `state` maps key -> [level, updated_at] and is
+    updated in place; missing buckets start full.
+    """
+    levels = []
+    wait = 0.0
+    for key, capacity, rate, cost in specs:
+        level, updated_at = state.get(key, (capacity, now))
+        level = min(capacity, level + max(now - updated_at, 0.0) * rate)
+        levels.append(level)
+        if level < cost:
+            wait = max(wait, (cost - level) / rate)
+    if wait > 0:
+        return wait
+    for (key, _, _, cost), level in zip(specs, levels):
+        state[key] = [level - cost, now]
+    return 0.0
+
+
+def drain_bucket(state: Dict[str, list], spec: BucketSpec, seconds: float, now: float):
+    """
+    Empty a request bucket so that the next request fits only after `seconds`
+    """
+    key, capacity, rate, _ = spec
+    level, updated_at = state.get(key, (capacity, now))
+    level = min(capacity, level + max(now - updated_at, 0.0) * rate)
+    state[key] = [min(level, 1 - rate * seconds), now]
+
+
+class MemoryBackend:
+    """
+    Bucket state in this process only
+    """
+
+    def __init__(self):
+        self._state: Dict[str, list] = {}
+
+    async def take(self, specs: List[BucketSpec]) -> float:
+        return take_from_buckets(self._state, specs, time.time())
+
+    async def drain(self, spec: BucketSpec, seconds: float):
+        drain_bucket(self._state, spec, seconds, time.time())
+
+
+class FileBackend:
+    """
+    Bucket state in a JSON file shared by every process on the host
+
+    Each operation is a read-modify-write under an exclusive flock. Waiting
+    for the lock blocks, so it runs in a worker thread, not on the event loop.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_FILE):
+        import fcntl
+        self._fcntl = fcntl
+        self.path = path
+
+    def _update(self, apply):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "r+") as f:
+            self._fcntl.flock(f, self._fcntl.LOCK_EX)
+            try:
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else {}
+                except ValueError:
+                    state = {}
+                result = apply(state)
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                # Flush before the lock is released, or another worker reads stale state
+                f.flush()
+                return result
+            finally:
+                self._fcntl.flock(f, self._fcntl.LOCK_UN)
+
+    async def take(self, specs: List[BucketSpec]) -> float:
+        return await asyncio.to_thread(self._update, lambda state: take_from_buckets(state, specs, time.time()))
+
+    async def drain(self, spec: BucketSpec, seconds: float):
+        await asyncio.to_thread(self._update, lambda state: drain_bucket(state, spec, seconds, time.time()))
+
+
+# Same logic as take_from_buckets, run atomically on the server
+_REDIS_TAKE = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 1])
+    local rate = tonumber(ARGV[i * 3])
+    local cost = tonumber(ARGV[i * 3 + 1])
+    local saved = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(saved[1]) or capacity
+    local ts = tonumber(saved[2]) or now
+    level = math.min(capacity, level + math.max(now - ts, 0) * rate)
+    levels[i] = level
+    if level < cost then
+        wait = math.max(wait, (cost - level) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local cost = tonumber(ARGV[i * 3 + 1])
+    redis.call('HSET', key, 'level', tostring(levels[i] - cost), 'ts', ARGV[1])
+    redis.call('EXPIRE', key, 3600)
+end
+return '0'
+"""
+
+# Same logic as drain_bucket: never refills a bucket that is already lower
+_REDIS_DRAIN = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[4])
+local saved = redis.call('HMGET', KEYS[1], 'level', 'ts')
+local level = tonumber(saved[1]) or capacity
+local ts = tonumber(saved[2]) or now
+level = math.min(capacity, level + math.max(now - ts, 0) * rate)
+level = math.min(level, 1 - rate * tonumber(ARGV[3]))
+redis.call('HSET', KEYS[1], 'level', tostring(level), 'ts', ARGV[1])
+redis.call('EXPIRE', KEYS[1], 3600)
+return 1
+"""
+
+
+class RedisBackend:
+    """
+    Bucket state in a Redis-compatible server, shared across nodes
+
+    Take and drain run as Lua scripts, so they are atomic across clients.
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise ImportError("RATE_LIMIT_BACKEND=redis requires the `redis` package (pip install redis)")
+        self._redis = aioredis.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE)
+        self._drain = self._redis.register_script(_REDIS_DRAIN)
+
+    async def take(self, specs: List[BucketSpec]) -> float:
+        args = [repr(time.time())]
+        for _, capacity, rate, cost in specs:
+            args.extend([capacity, rate, cost])
+        return float(await self._take(keys=[spec[0] for spec in specs], args=args))
+
+    async def drain(self, spec: BucketSpec, seconds: float):
+        key, capacity, rate, _ = spec
+        await self._drain(keys=[key], args=[repr(time.time()), rate, seconds, capacity])
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "file":
+        return FileBackend()
+    if name == "redis":
+        return RedisBackend()
+    if name != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND {name!r}, using memory")
+    return MemoryBackend()
+
+
+class ProviderRateLimiter:
+    """
+    Request and token buckets for one provider
+
+    Args:
+        name: Provider id, also the key prefix in the backend
+        rpm: Requests per minute, 0 for no limit
+        tpm: Tokens per minute, 0 for no limit
+        backend: Where the bucket state lives
+    """
+
+    def __init__(self, name: str, rpm: float, tpm: float, backend):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.backend = backend
+        self.granted = 0
+        self.waited = 0
+        self.rejected = 0
+        self.throttled = 0
+
+    def _specs(self, tokens: int) -> List[BucketSpec]:
+        specs = []
+        if self.rpm > 0:
+            specs.append((f"ratelimit:{self.name}:requests", self.rpm, self.rpm / 60, 1))
+        if self.tpm > 0:
+            # A request larger than the whole bucket could never go out otherwise
+            specs.append((f"ratelimit:{self.name}:tokens", self.tpm, self.tpm / 60, min(tokens, self.tpm)))
+        return specs
+
+    async def acquire(self, tokens: int = 0, max_wait: float = RATE_LIMIT_MAX_WAIT) -> bool:
+        """
+        Take capacity for one request of about `tokens` tokens
+
+        Waits while the buckets refill if that takes at most `max_wait`
+        seconds in total; returns False when the caller should fail over.
+        """
+        specs = self._specs(tokens)
+        if not specs:
+            return True
+        deadline = time.monotonic() + max_wait
+        waited = False
+        while True:
+            try:
+                wait = await self.backend.take(specs)
+            except Exception as e:
+                # A broken shared store must not take the chatbot down with it
+                logger.error(f"Rate limit backend error for {self.name}: {e}")
+                return True
+            if wait <= 0:
+                self.granted += 1
+                if waited:
+                    self.waited += 1
+                return True
+            if time.monotonic() + wait > deadline:
+                self.rejected += 1
+                logger.warning(f"{self.name} rate limit reached, capacity in {wait:.1f}s")
+                return False
+            waited = True
+            await asyncio.sleep(wait)
+
+    async def throttle(self, seconds: float):
+        """
+        The provider answered 429: stop sending it requests for `seconds`
+        """
+        if self.rpm <= 0:
+            return
+        self.throttled += 1
+        try:
+            await self.backend.drain(self._specs(0)[0], seconds)
+        except Exception as e:
+            logger.error(f"Rate limit backend error for {self.name}: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "granted": self.granted,
+            "waited": self.waited,
+            "rejected": self.rejected,
+            "throttled_by_provider": self.throttled
+        }
+
+
+_backend = None
+rate_limiters: Dict[str, ProviderRateLimiter] = {}
+
+
+def get_rate_limiter(name: str) -> ProviderRateLimiter:
+    """
+    Limiter for a provider, created on first use with its configured quota
+    """
+    global _backend
+    if name not in rate_limiters:
+        if _backend is None:
+            _backend = create_backend()
+        defaults = DEFAULT_LIMITS.get(name, {"rpm": 0, "tpm": 0})
+        rate_limiters[name] = ProviderRateLimiter(
+            name,
+            rpm=float(os.getenv(f"{name.upper()}_RPM", defaults["rpm"])),
+            tpm=float(os.getenv(f"{name.upper()}_TPM", defaults["tpm"])),
+            backend=_backend,
+        )
+    return rate_limiters[name]
+
+
+def estimate_tokens(input_tokens: Optional[int]) -> int:
+    """
+    Tokens to reserve for a call: its prompt plus the expected completion
+    """
+    return (input_tokens or 0) + RATE_LIMIT_OUTPUT_TOKENS
@@ -0,0 +1,112 @@
+"""
+Exact-match response cache for /chat.
+
+Answers are keyed on a normalized hash of the template choice, the message
+and the rendered chat history, kept in LRU order, bounded both by entry
+count and by total size, and expire after a TTL so crisis alerts do not go
+stale.
+"""
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "1800"))
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercase, drop punctuation and collapse whitespace
+    """
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def cache_key(use_groq: bool, message: str, chat_history: str = "") -> str:
+    """
+    Stable key for a chat request
+
+    Args:
+        use_groq: Template choice (customize-plan vs regular)
+        message: The user's message
+        chat_history: History block as rendered into the prompt
+    """
+    parts = ["customize" if use_groq else "regular", normalize_text(message), normalize_text(chat_history)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    In-process LRU cache with a TTL and a byte budget
+
+    Values are result dicts as returned by the query functions; their size is
+    estimated from the length of the response text.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES,
+                 ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def set(self, key: str, value: dict):
+        size = len(value.get("response", "").encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "ttl_s": self.ttl
+        }
+
+
+response_cache = ResponseCache()
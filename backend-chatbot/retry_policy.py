@@ -0,0 +1,194 @@
+"""
+Shared async retry policy for provider calls.
+
+Replaces the per-provider retry loops that slept with time.sleep. Retries use
+exponential backoff with full jitter, honour Retry-After headers, never retry
+billing/auth failures, and draw from a global retry budget so that retries
+cannot grow beyond a fixed fraction of traffic while a provider is down.
+Retries also go through the provider's rate limiter (rate_limiter.py), and a
+429 drains it, so retrying does not add to an overload.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import defaultdict, deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from tracing import SPAN_KIND_CLIENT, span
+
+logger = logging.getLogger("yatra-sevak")
+
+# 401/403: bad credentials, 402: subscription lapsed. Retrying cannot help.
+NON_RETRYABLE_STATUS = {401, 402, 403}
+# Besides these, any 5xx is retried; other 4xx are the caller's fault.
+RETRYABLE_STATUS = {408, 425, 429}
+
+
+def is_retryable(status_code: int) -> bool:
+    if status_code in NON_RETRYABLE_STATUS:
+        return False
+    return status_code in RETRYABLE_STATUS or status_code >= 500
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of recent requests across all providers
+
+    A retry is allowed while retries in the last `window` seconds stay below
+    max(min_retries, ratio * requests). This keeps a small trickle of retries
+    available at low traffic but stops retry storms when a provider is down.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 5, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests = deque()
+        self._retries = deque()
+
+    def _prune(self, now):
+        cutoff = now - self.window
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+    def record_request(self):
+        self._requests.append(time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """
+        Reserve one retry from the budget; returns False when it is spent
+        """
+        now = time.monotonic()
+        self._prune(now)
+        if len(self._retries) >= max(self.min_retries, self.ratio * len(self._requests)):
+            return False
+        self._retries.append(now)
+        return True
+
+
+def parse_retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    Seconds to wait according to a Retry-After header, if present
+
+    Accepts both delta-seconds and HTTP-date forms.
+    """
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Runs a provider request with jittered exponential backoff
+
+    Args:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff base in seconds; attempt n waits up to base_delay * 2**n
+        max_delay: Upper bound for any single wait, including Retry-After
+        budget: Shared RetryBudget limiting retries across providers
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 10.0,
+                 budget: Optional[RetryBudget] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.retries = defaultdict(int)
+        self.budget_exhausted = defaultdict(int)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def execute(self, provider: str, send: Callable[[], Awaitable[httpx.Response]],
+                      limiter=None, tokens: int = 0) -> httpx.Response:
+        """
+        Call `send` until it returns a response that should not be retried
+
+        Non-retryable and exhausted error responses are returned to the caller
+        as-is so it can build its own error result; transport errors from the
+        last attempt are re-raised.
+
+        Args:
+            provider: Provider id, used for logging and counters
+            send: Makes one attempt
+            limiter: Optional ProviderRateLimiter; the first attempt is expected
+                to have acquired it already, every retry acquires it again
+            tokens: Estimated tokens per attempt, for the limiter
+        """
+        self.budget.record_request()
+
+        for attempt in range(self.max_attempts):
+            logger.info(f"Attempting {provider} API call (attempt {attempt+1}/{self.max_attempts})...")
+            try:
+                with span(f"{provider}.attempt", SPAN_KIND_CLIENT, attempt=attempt + 1) as attempt_span:
+                    response = await send()
+                    if attempt_span is not None:
+                        attempt_span.set(**{"http.status_code": response.status_code})
+            except httpx.TransportError as e:
+                logger.error(f"{provider} API transport error: {e!r}")
+                if attempt == self.max_attempts - 1:
+                    raise
+                delay = self.backoff(attempt)
+                error = e
+            else:
+                if not is_retryable(response.status_code):
+                    return response
+                logger.error(f"{provider} API returned {response.status_code}")
+                if attempt == self.max_attempts - 1:
+                    return response
+                retry_after = parse_retry_after(response)
+                if retry_after is not None and retry_after > self.max_delay:
+                    logger.warning(f"{provider} asked to retry after {retry_after:.0f}s, giving up")
+                    return response
+                delay = retry_after if retry_after is not None else self.backoff(attempt)
+                error = None
+                if response.status_code == 429 and limiter is not None:
+                    await limiter.throttle(delay)
+
+            if not self.budget.try_acquire():
+                self.budget_exhausted[provider] += 1
+                logger.warning(f"Retry budget exhausted, not retrying {provider}")
+                if error is not None:
+                    raise error
+                return response
+
+            self.retries[provider] += 1
+            logger.info(f"Retrying {provider} in {delay:.2f} seconds...")
+            with span(f"{provider}.backoff", delay_s=round(delay, 3)):
+                await asyncio.sleep(delay)
+                allowed = limiter is None or await limiter.acquire(tokens)
+
+            if not allowed:
+                logger.warning(f"{provider} rate limit reached, not retrying")
+                if error is not None:
+                    raise error
+                return response
+            if error is None:
+                await response.aclose()
+
+
+provider_retry_policy = RetryPolicy(
+    max_attempts=int(os.getenv("PROVIDER_MAX_ATTEMPTS", "3")),
+    base_delay=float(os.getenv("PROVIDER_RETRY_BASE_DELAY", "1")),
+    max_delay=float(os.getenv("PROVIDER_RETRY_MAX_DELAY", "10")),
+    budget=RetryBudget(
+        ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.2")),
+        min_retries=int(os.getenv("RETRY_BUDGET_MIN_RETRIES", "5")),
+    ),
+)
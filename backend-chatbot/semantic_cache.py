@@ -0,0 +1,178 @@
+"""
+Semantic near-duplicate cache for /chat.
+
+Sits behind the exact-match cache (response_cache.py) and catches rephrasings
+such as "what to do in Tokyo" vs "Tokyo things to do". Messages are embedded
+on the CPU with a hashed word and character n-gram model, stored in a
+NumPy-backed ring buffer, and matched with one vectorized dot product over
+the whole index. A cached answer is only reused when the similarity clears
+the threshold and the destination terms of both messages are the same.
+"""
+import os
+import re
+import time
+import zlib
+from typing import FrozenSet, Optional
+
+import numpy as np
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.6"))
+SEMANTIC_CACHE_CAPACITY = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "100000"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "1800"))
+EMBEDDING_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "128"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that carry the intent of a travel question but not its destination.
+# Whatever is left after removing them is treated as the destination terms.
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be best between can could day days do does
+during for from get go going good great guide how i ideas in into itinerary is it its me month most my near need
+of on or our place places plan please recommend should show some spend spot spots suggest
+tell than that the their there these things this to top trip travel traveling travelling
+us vacation visit visiting want was we week weekend what when where which who why will
+with would you your
+""".split())
+
+
+def tokenize(text: str):
+    return _WORD.findall(text.lower())
+
+
+def destination_terms(text: str) -> FrozenSet[str]:
+    """
+    Content words of a message that are not generic travel vocabulary
+
+    For "what to do in Tokyo" this is {"tokyo"}; two messages about different
+    places (or different hotel budgets) never share a cached answer.
+    """
+    return frozenset(token for token in tokenize(text) if token not in STOPWORDS)
+
+
+class HashedNgramEmbedder:
+    """
+    Dependency-free text embedder using the hashing trick
+
+    Features are content words (weight 1) and character trigrams of every
+    word (weight 0.5), hashed with crc32 into `dim` signed buckets and L2
+    normalized, so cosine similarity is a plain dot product.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+
+    def _add(self, vector, feature: str, weight: float):
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % self.dim] += weight if (h >> 31) & 1 else -weight
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            if token not in STOPWORDS:
+                self._add(vector, "w:" + token, 1.0)
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                self._add(vector, padded[i:i + 3], 0.5)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class VectorIndex:
+    """
+    Fixed-capacity ring buffer of unit vectors with brute-force top-k search
+
+    One float32 matrix holds every vector, so a search is a single
+    matrix-vector product plus argpartition. When the index is full the
+    oldest entry is overwritten.
+    """
+
+    def __init__(self, dim: int, capacity: int):
+        self.dim = dim
+        self.capacity = capacity
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.size = 0
+        self._next = 0
+
+    def add(self, vector: np.ndarray) -> int:
+        slot = self._next
+        self.vectors[slot] = vector
+        self._next = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return slot
+
+    def search(self, vector: np.ndarray, k: int = 8):
+        """
+        Return (slots, scores) of the k most similar vectors, best first
+        """
+        if self.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = self.vectors[:self.size] @ vector
+        k = min(k, self.size)
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        return top, scores[top]
+
+
+class SemanticCache:
+    """
+    Near-duplicate answer cache built on VectorIndex
+
+    Args:
+        threshold: Minimum cosine similarity for a hit
+        capacity: Maximum entries; the oldest are overwritten first
+        ttl: Seconds an answer stays valid
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, capacity: int = SEMANTIC_CACHE_CAPACITY,
+                 ttl: float = SEMANTIC_CACHE_TTL, embedder: Optional[HashedNgramEmbedder] = None):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.embedder = embedder or HashedNgramEmbedder()
+        self.index = VectorIndex(self.embedder.dim, capacity)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._entries = [None] * capacity  # slot -> (scope, destination terms, value)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, scope: str, message: str) -> Optional[dict]:
+        """
+        Return a cached answer for a near-duplicate of `message`, if any
+
+        Args:
+            scope: Template choice; answers never cross scopes
+            message: The user's message
+        """
+        terms = destination_terms(message)
+        slots, scores = self.index.search(self.embedder.embed(message))
+        now = time.monotonic()
+        for slot, score in zip(slots, scores):
+            if score < self.threshold:
+                break
+            entry = self._entries[slot]
+            if entry is not None and entry[0] == scope and entry[1] == terms and self._expires[slot] > now:
+                self.hits += 1
+                return entry[2]
+        self.misses += 1
+        return None
+
+    def store(self, scope: str, message: str, value: dict):
+        slot = self.index.add(self.embedder.embed(message))
+        self._entries[slot] = (scope, destination_terms(message), value)
+        self._expires[slot] = time.monotonic() + self.ttl
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": self.index.size,
+            "capacity": self.index.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+semantic_cache = SemanticCache() if SEMANTIC_CACHE_ENABLED else None
@@ -4,6 +4,9 @@ from pydantic import BaseModel
 from typing import List, Dict, Optional
 import random
 
+from intent_engine import intent_engine
+from destination_store import build_store
+
 app = FastAPI(title="Smart.AI Travel API", description="Travel chatbot API using simpler implementation")
 
 # CORS configuration to allow requests from your Next.js frontend
@@ -49,6 +52,9 @@ destinations = [
   }
 ]
 
+# Built-in destinations merged with the frontend catalog, indexed for lookup by name
+destination_store = build_store(destinations)
+
 # Define request and response models
 class MessageItem(BaseModel):
     text: str
@@ -61,41 +67,59 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
 
+def pick_destination(message: str, chat_history: List[MessageItem]):
+    """
+    The destination the user named, here or earlier in the chat, or a suggestion when they named none
+    """
+    destination = destination_store.resolve(message, chat_history)
+    if destination is None:
+        destination = destination_store.get(random.choice(destinations)["name"])
+    return destination
+
+def hotel_lines(destination) -> str:
+    tiers = ["$450/night (5-star luxury)", "$320/night (4-star with ocean view)", "$250/night (4-star boutique hotel)"]
+    return "\n".join(f"• {hotel} - {tier}" for hotel, tier in zip(destination.hotels, tiers))
+
 # Generate a response based on the user's message
 def generate_response(message: str, chat_history: List[MessageItem] = []) -> str:
-    lowerMessage = message.lower()
+    # Weighted keyword matching on whole words, see intent_engine.py
+    intent = intent_engine.match(message)
     
     # Introduction/greeting
-    if "hello" in lowerMessage or "hi" in lowerMessage or "introduce" in lowerMessage:
+    if intent == "greeting":
         return "✈️ Namaste! I am Smart.AI Travel, your dedicated travel assistant. I can help you plan your perfect trip by providing information about flights, hotels, destinations, and travel tips. Whether you're looking for luxury getaways or budget-friendly adventures, I'm here to make your travel planning seamless and enjoyable. How may I assist you with your travel plans today?"
     
     # Flight related queries
-    if "flight" in lowerMessage or "fly" in lowerMessage or "airline" in lowerMessage:
-        destination = random.choice(destinations)
-        return f"✈️ I'd be happy to help you find flights to {destination['name']}! Here are some options:\n\n1. Economy: $950 (22hr with 1 stop)\n2. Premium Economy: $1,800 (20hr nonstop)\n3. Business Class: $4,200 (18hr nonstop)\n4. First Class: $8,500 (18hr nonstop)\n\nWould you like me to provide more details about any of these options? I can also help with specific dates, airlines, or other destinations."
+    if intent == "flight":
+        destination = pick_destination(message, chat_history)
+        return f"✈️ I'd be happy to help you find flights to {destination.name}! Here are some options:\n\n1. Economy: $950 (22hr with 1 stop)\n2. Premium Economy: $1,800 (20hr nonstop)\n3. Business Class: $4,200 (18hr nonstop)\n4. First Class: $8,500 (18hr nonstop)\n\nWould you like me to provide more details about any of these options? I can also help with specific dates, airlines, or other destinations."
     
     # Hotel related queries
-    if "hotel" in lowerMessage or "stay" in lowerMessage or "accommodation" in lowerMessage or "room" in lowerMessage:
-        destination = random.choice(destinations)
-        return f"🏨 Here are some excellent hotel options in {destination['name']}:\n\n• {destination['hotels'][0]} - $450/night (5-star luxury)\n• {destination['hotels'][1]} - $320/night (4-star with ocean view)\n• {destination['hotels'][2]} - $250/night (4-star boutique hotel)\n\nAll these hotels offer free Wi-Fi, swimming pools, and are highly rated for their service. Would you like more information about amenities, availability, or other accommodation options?"
+    if intent == "hotel":
+        destination = pick_destination(message, chat_history)
+        if not destination.hotels:
+            return f"🏨 I don't have hotel listings for {destination.name} yet. Staying near {(destination.attractions or ['the city centre'])[0]} keeps the main sights within easy reach.\n\nWould you like a suggested itinerary or travel tips for {destination.name} instead?"
+        return f"🏨 Here are some excellent hotel options in {destination.name}:\n\n{hotel_lines(destination)}\n\nAll these hotels offer free Wi-Fi, swimming pools, and are highly rated for their service. Would you like more information about amenities, availability, or other accommodation options?"
     
     # Destination information
-    if "destination" in lowerMessage or "place" in lowerMessage or "country" in lowerMessage or "city" in lowerMessage:
-        destination = random.choice(destinations)
-        return f"🌍 {destination['name']} is a fantastic choice! Here's what you should know:\n\nTop attractions: {', '.join(destination['attractions'])}\n\nBest time to visit: Depends on your preferences, but generally the shoulder seasons offer good weather with fewer crowds.\n\nWeather: {destination['weather']}\n\nWould you like recommendations for hotels, restaurants, or specific activities in {destination['name']}?"
+    if intent == "destination":
+        destination = pick_destination(message, chat_history)
+        return f"🌍 {destination.name} is a fantastic choice! Here's what you should know:\n\nTop attractions: {', '.join(destination.attractions)}\n\nBest time to visit: Depends on your preferences, but generally the shoulder seasons offer good weather with fewer crowds.\n\nWeather: {destination.weather or 'Check the seasonal forecast before you book'}\n\nWould you like recommendations for hotels, restaurants, or specific activities in {destination.name}?"
     
     # Itinerary or planning
-    if "itinerary" in lowerMessage or "plan" in lowerMessage or "schedule" in lowerMessage:
-        destination = random.choice(destinations)
-        return f"📅 Here's a suggested 3-day itinerary for {destination['name']}:\n\nDay 1: Morning - Visit {destination['attractions'][0]}\nAfternoon - Explore {destination['attractions'][1]}\nEvening - Dinner at a local restaurant\n\nDay 2: Full day tour of {destination['attractions'][2]} and surrounding areas\nEvening - Cultural show and dinner\n\nDay 3: Morning - Relax at {destination['attractions'][3]}\nAfternoon - Shopping and souvenirs\nEvening - Farewell dinner with local cuisine\n\nWould you like me to customize this itinerary based on your interests?"
+    if intent == "itinerary":
+        destination = pick_destination(message, chat_history)
+        stops = destination.itinerary_stops(4)
+        return f"📅 Here's a suggested 3-day itinerary for {destination.name}:\n\nDay 1: Morning - Visit {stops[0]}\nAfternoon - Explore {stops[1]}\nEvening - Dinner at a local restaurant\n\nDay 2: Full day tour of {stops[2]} and surrounding areas\nEvening - Cultural show and dinner\n\nDay 3: Morning - Relax at {stops[3]}\nAfternoon - Shopping and souvenirs\nEvening - Farewell dinner with local cuisine\n\nWould you like me to customize this itinerary based on your interests?"
     
     # Weather information
-    if "weather" in lowerMessage or "temperature" in lowerMessage or "climate" in lowerMessage:
-        destination = random.choice(destinations)
-        return f"🌤️ The weather in {destination['name']}:\n\n{destination['weather']}\n\nIf you're planning to visit soon, I recommend packing layers and checking the forecast closer to your travel date. Would you like specific packing suggestions for this destination?"
+    if intent == "weather":
+        destination = pick_destination(message, chat_history)
+        climate = destination.weather or "I don't have climate details for this destination yet."
+        return f"🌤️ The weather in {destination.name}:\n\n{climate}\n\nIf you're planning to visit soon, I recommend packing layers and checking the forecast closer to your travel date. Would you like specific packing suggestions for this destination?"
     
     # Travel tips
-    if "tip" in lowerMessage or "advice" in lowerMessage or "suggestion" in lowerMessage:
+    if intent == "tips":
         return "✨ Here are some general travel tips:\n\n• Always keep digital copies of important documents\n• Notify your bank about international travel\n• Get travel insurance for peace of mind\n• Pack a basic first-aid kit\n• Learn a few phrases in the local language\n• Use a VPN when connecting to public Wi-Fi\n\nWould you like more specific tips for a particular destination?"
     
     # Default response for other queries
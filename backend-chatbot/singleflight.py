@@ -0,0 +1,69 @@
+"""
+Single-flight coalescing of identical in-flight requests.
+
+The first request for a key (the leader) runs the upstream call; concurrent
+requests for the same key (followers) await the leader's future instead of
+calling the provider again. If the leader fails, every follower gets the same
+exception. If the leader is cancelled (client disconnected), followers are
+not left hanging: the next one to wake up takes over and runs the call itself.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable]):
+        """
+        Run `call` once per key among concurrent callers and share its result
+        """
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.followers += 1
+            try:
+                # shield: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled, not us: compete to become the new leader
+                self.followers -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Followers re-raise it; mark it retrieved so asyncio does not warn
+            # about an unretrieved exception when there were none.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.leaders,
+            "coalesced": self.followers,
+            "coalescing_ratio": round(self.followers / total, 3) if total else 0.0
+        }
+
+
+chat_singleflight = SingleFlight()
@@ -0,0 +1,240 @@
+"""
+Versioned registry of the chat templates.
+
+A template is a static prefix (persona and all instructions) followed by a
+short suffix that holds the per-request content. Keeping everything that
+varies at the very end lets providers reuse their prompt prefix cache, and
+only the suffix has to be formatted per request. Token counts of every
+prefix are computed once when the templates are registered at startup, and
+`describe()` reports what each template costs.
+
+Version 1 is the original layout with the user input on the second line;
+version 2 (the default) moves it to the end. TEMPLATE_VERSION selects the
+active version.
+"""
+import os
+from typing import Dict, Optional, Tuple
+
+from token_counter import count_tokens
+
+TEMPLATE_VERSION = int(os.getenv("TEMPLATE_VERSION", "2"))
+
+PERSONA = "You are a helpful travel assistant named Smart.AI Travel."
+FOCUS = "Focus on flights, hotels, destinations, and travel tips."
+
+# Instructions for customize-plan mode (when coming from customize-plan page)
+CUSTOMIZE_INSTRUCTIONS = """CRITICAL INSTRUCTION: For any destination mentioned, you MUST FIRST thoroughly check if there are any recent (within the past 5-7 days) disasters, floods, attacks, political unrest, health emergencies, or other crisis situations that might affect travel safety.
+
+Format the crisis information as follows:
+⚠️ CRISIS ALERT ⚠️
+[List any current crisis situations with detailed information about:
+1. The exact nature of the crisis
+2. When it started and current status
+3. Affected areas within the destination
+4. Severity level
+5. Safety recommendations
+6. Impact on travel infrastructure (airports, hotels, transportation)]
+
+If a crisis exists:
+- ONLY provide the crisis information and DO NOT continue with regular travel planning
+- Clearly explain why travel to this destination is not recommended at this time
+- Suggest alternative destinations if appropriate
+
+If no current crisis situations exist, explicitly state "No current crisis situations reported in this area" and then continue with regular travel information.
+
+This crisis information MUST appear at the beginning of your response, before any other travel information.
+
+After addressing any crisis situations (or confirming there are none), provide a comprehensive, detailed response to the user's query with the following information:
+
+1. DESTINATION OVERVIEW (if applicable):
+   - Brief history and cultural significance
+   - Best times to visit with seasonal considerations
+   - Local customs and etiquette travelers should know
+   - Language considerations and useful phrases
+
+2. ACCOMMODATION OPTIONS (if applicable):
+   - Range of options from luxury to budget
+   - Recommended neighborhoods to stay in
+   - Typical amenities and price ranges
+   - Special accommodation types unique to the region
+
+3. TRANSPORTATION DETAILS (if applicable):
+   - Getting to the destination (flight routes, train options)
+   - Getting around locally (public transit, car rentals, etc.)
+   - Transportation passes or money-saving options
+   - Accessibility considerations
+
+4. ACTIVITIES AND ATTRACTIONS (if applicable):
+   - Must-see attractions with visiting tips
+   - Off-the-beaten-path experiences
+   - Cultural events or seasonal activities
+   - Family-friendly options if relevant
+
+5. PRACTICAL TRAVEL TIPS:
+   - Budget considerations and currency information
+   - Safety tips specific to the destination
+   - Packing recommendations
+   - Visa and entry requirements
+   - Local food specialties to try
+
+Provide a thorough, well-organized response that gives the user comprehensive information while being easy to read. Use appropriate formatting to make your response scannable."""
+
+# Instructions for regular mode (when accessing chatbot directly)
+REGULAR_INSTRUCTIONS = """CRITICAL INSTRUCTION: For any destination mentioned, you MUST FIRST thoroughly check if there are any recent (within the past 5-7 days) disasters, floods, attacks, political unrest, health emergencies, or other crisis situations that might affect travel safety.
+
+Format the crisis information as follows:
+⚠️ CRISIS ALERT ⚠️
+[List any current crisis situations with detailed information about:
+1. The exact nature of the crisis
+2. When it started and current status
+3. Affected areas within the destination
+4. Severity level
+5. Safety recommendations
+6. Impact on travel infrastructure (airports, hotels, transportation)
+7. Root causes of the crisis
+8. Potential timeline for resolution if known]
+
+If a crisis exists:
+- ONLY provide the crisis information and DO NOT continue with regular travel planning
+- Clearly explain why travel to this destination is not recommended at this time
+- Suggest alternative destinations if appropriate
+
+If no current crisis situations exist, explicitly state "No current crisis situations reported in this area" and then continue with regular travel information.
+
+This crisis information MUST appear at the beginning of your response, before any other travel information.
+
+After addressing any crisis situations (or confirming there are none), provide a comprehensive, detailed response to the user's query with the following information where relevant:
+
+1. DESTINATION OVERVIEW (if applicable):
+   - Brief history and cultural significance
+   - Best times to visit with seasonal considerations
+   - Local customs and etiquette travelers should know
+   - Language considerations and useful phrases
+   - Current local events or festivals
+
+2. ACCOMMODATION OPTIONS (if applicable):
+   - Range of options from luxury to budget
+   - Recommended neighborhoods to stay in
+   - Typical amenities and price ranges
+   - Special accommodation types unique to the region
+   - Booking tips and peak season considerations
+
+3. TRANSPORTATION DETAILS (if applicable):
+   - Getting to the destination (flight routes, train options)
+   - Getting around locally (public transit, car rentals, etc.)
+   - Transportation passes or money-saving options
+   - Accessibility considerations
+   - Traffic or transportation quirks to be aware of
+
+4. ACTIVITIES AND ATTRACTIONS (if applicable):
+   - Must-see attractions with visiting tips
+   - Off-the-beaten-path experiences
+   - Cultural events or seasonal activities
+   - Family-friendly options if relevant
+   - Outdoor activities and natural attractions
+   - Shopping and entertainment districts
+
+5. DINING AND CUISINE (if applicable):
+   - Local specialties and must-try dishes
+   - Price ranges for dining options
+   - Food markets and street food safety
+   - Dining etiquette and tipping customs
+   - Dietary restriction considerations
+
+6. PRACTICAL TRAVEL TIPS:
+   - Budget considerations and currency information
+   - Safety tips specific to the destination
+   - Packing recommendations based on climate and activities
+   - Visa and entry requirements
+   - Health considerations and medical facilities
+   - Internet access and communication options
+   - Local laws travelers should be aware of
+
+Provide a thorough, well-organized response that gives the user comprehensive information while being easy to read. Use appropriate formatting to make your response scannable. Make sure your response is directly relevant to what the user asked, but provide additional helpful information they might not have thought to ask about."""
+
+
+class RenderedPrompt:
+    """
+    A template rendered for one request, still split into prefix and suffix
+    """
+    __slots__ = ("template", "prefix", "suffix", "input_tokens")
+
+    def __init__(self, template: "PromptTemplate", prefix: str, suffix: str):
+        self.template = template
+        self.prefix = prefix
+        self.suffix = suffix
+        # Counted once here; only the suffix varies per request
+        self.input_tokens = template.prefix_tokens + count_tokens(suffix)
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+
+class PromptTemplate:
+    def __init__(self, name: str, version: int, prefix: str, suffix: str):
+        self.name = name
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        self.prefix_tokens = count_tokens(prefix)
+        self.suffix_tokens = count_tokens(suffix.format(user_input="", chat_history=""))
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    def render(self, user_input: str, chat_history: str = "") -> RenderedPrompt:
+        return RenderedPrompt(self, self.prefix, self.suffix.format(user_input=user_input, chat_history=chat_history))
+
+    def describe(self) -> dict:
+        return {
+            "id": self.id,
+            "prefix_chars": len(self.prefix),
+            "prefix_tokens": self.prefix_tokens,
+            "suffix_overhead_tokens": self.suffix_tokens,
+            "base_tokens": self.prefix_tokens + self.suffix_tokens
+        }
+
+
+class TemplateRegistry:
+    def __init__(self, active_version: int = TEMPLATE_VERSION):
+        self.active_version = active_version
+        self._templates: Dict[Tuple[str, int], PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate):
+        self._templates[(template.name, template.version)] = template
+
+    def get(self, name: str, version: Optional[int] = None) -> PromptTemplate:
+        """
+        Look up a template; defaults to the active version
+        """
+        return self._templates[(name, version or self.active_version)]
+
+    def describe(self) -> dict:
+        return {
+            "active_version": self.active_version,
+            "templates": [
+                dict(template.describe(), active=version == self.active_version)
+                for (_, version), template in sorted(self._templates.items())
+            ]
+        }
+
+
+registry = TemplateRegistry()
+
+for _name, _instructions in (("customize", CUSTOMIZE_INSTRUCTIONS), ("regular", REGULAR_INSTRUCTIONS)):
+    registry.register(PromptTemplate(
+        _name, 1,
+        prefix=f"{PERSONA}\n",
+        suffix=f"Provide comprehensive, detailed travel information for: {{user_input}}.\n{FOCUS}\n{{chat_history}}\n{_instructions}",
+    ))
+    registry.register(PromptTemplate(
+        _name, 2,
+        prefix=(
+            f"{PERSONA}\n"
+            f"Provide comprehensive, detailed travel information for the traveler's request at the end of this prompt.\n"
+            f"{FOCUS}\n\n{_instructions}"
+        ),
+        suffix="\n\n{chat_history}Traveler's request: {user_input}",
+    ))
@@ -0,0 +1,27 @@
+"""
+Cheap token counting shared by the prompt and history stages.
+
+The providers do not expose their tokenizers without extra dependencies, so
+this approximates a BPE tokenizer: punctuation marks count as one token each
+and words as one token per six characters, which tracks the Llama 3 and
+Mixtral tokenizers closely enough for budgeting English travel text.
+"""
+import re
+
+_PIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    return sum((len(piece) + 5) // 6 for piece in _PIECE.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut `text` to at most `max_tokens` tokens on a piece boundary, marking the cut with an ellipsis
+    """
+    used = 0
+    for match in _PIECE.finditer(text):
+        used += (len(match.group()) + 5) // 6
+        if used > max_tokens - 1:
+            return text[:match.start()].rstrip() + " …"
+    return text
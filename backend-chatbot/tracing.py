@@ -0,0 +1,249 @@
+"""
+Lightweight per-request span tracing.
+
+TracingMiddleware opens a trace for every /chat, /chat/stream and /chat/batch
+request. Code on the request path wraps its stages in `with span("name"):`;
+spans nest through contextvars, so spans opened in fan-out and hedge tasks
+land under the stage that started them. When no trace is active (scripts,
+benchmarks) `span` does nothing.
+
+Finished traces are reported twice:
+  - in a Server-Timing response header (`stage;dur=ms`, one entry per span),
+    readable in the browser's network panel
+  - optionally appended to TRACE_EXPORT_FILE as OTLP/JSON, one
+    ExportTraceServiceRequest per line, written by a background thread
+
+TRACING_ENABLED=false turns both off.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+logger = logging.getLogger("yatra-sevak")
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+TRACED_PATHS = {"/chat", "/chat/stream", "/chat/batch"}
+# Keep the header small; the export file has every span
+SERVER_TIMING_MAX_ENTRIES = 40
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], kind: int, attributes: dict):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+    def server_timing(self) -> str:
+        """
+        Server-Timing header value: finished spans in start order, then the total
+        """
+        entries = []
+        seen = {}
+        root = self.spans[0] if self.spans else None
+        for s in self.spans[1:]:
+            if s.end_ns is None or len(entries) >= SERVER_TIMING_MAX_ENTRIES:
+                continue
+            # Repeated names (one span per attempt) get a counter
+            seen[s.name] = seen.get(s.name, 0) + 1
+            name = s.name if seen[s.name] == 1 else f"{s.name}-{seen[s.name]}"
+            entries.append(f"{name};dur={s.duration_ms():.1f}")
+        if root is not None:
+            entries.append(f"total;dur={root.duration_ms():.1f}")
+        return ", ".join(entries)
+
+
+_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """
+    Time a stage of the current request as a child of the current span
+
+    Yields the Span (or None outside a trace) so attributes can be added
+    once the outcome is known.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _span.get()
+    current = Span(name, parent.span_id if parent else None, kind, attributes)
+    trace.spans.append(current)
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__ if not str(e) else f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _span.reset(token)
+
+
+def annotate(**attributes):
+    """
+    Add attributes to the current span, if there is one
+    """
+    current = _span.get()
+    if current is not None and _trace.get() is not None:
+        current.set(**attributes)
+
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL):
+    """
+    Decorator wrapping every call of a function, sync or async, in a span
+    """
+    def decorate(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name, kind):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace, service_name: str = "yatra-sevak") -> dict:
+    """
+    OTLP/JSON ExportTraceServiceRequest for one trace
+    """
+    spans = []
+    for s in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in s.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": s.error} if s.error else {"code": STATUS_OK}
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{"scope": {"name": "yatra-sevak.tracing"}, "spans": spans}]
+        }]
+    }
+
+
+class FileExporter:
+    """
+    Appends traces as OTLP/JSON lines from a background thread, so the event
+    loop never waits on the disk
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        self._queue.put(trace)
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            batch = [trace]
+            while not self._queue.empty() and len(batch) < 100:
+                batch.append(self._queue.get())
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for item in batch:
+                        f.write(json.dumps(to_otlp(item), separators=(",", ":")) + "\n")
+            except OSError as e:
+                logger.error(f"Trace export to {self.path} failed: {e}")
+
+
+exporter = FileExporter(TRACE_EXPORT_FILE) if TRACING_ENABLED and TRACE_EXPORT_FILE else None
+
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware: one trace per traced request, Server-Timing on the response
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED or scope["path"] not in TRACED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        trace_token = _trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Streaming responses only get the stages finished before the first byte
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            with span(f"{scope['method']} {scope['path']}", kind=SPAN_KIND_SERVER, **{"http.route": scope["path"]}):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            _trace.reset(trace_token)
+            if exporter is not None:
+                exporter.export(trace)